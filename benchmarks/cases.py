@@ -0,0 +1,324 @@
+import os
+import sys
+import json
+import time
+import shutil
+import tempfile
+import subprocess
+
+# Benchmark cases, each run by run.py in its own process inside a scratch
+# copy of the launcher (so the caches, bin/ and instances.db it touches are
+# throwaway):
+#
+#   python benchmarks/cases.py CASE RUNS
+#
+# Samples are printed as one JSON line prefixed with RESULT_PREFIX.
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+APP_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, APP_DIR)
+
+RESULT_PREFIX = "BENCH_RESULT "
+SERVER_URL = os.environ.get("BENCH_SERVER_URL", "")
+INSTANCE_COUNT = int(os.environ.get("BENCH_INSTANCES", "10000"))
+MOD_COUNT = int(os.environ.get("BENCH_MODS", "10000"))
+SAVE_SAMPLES = 100 # Store writes timed per run, for each kind of write
+MOD_INSTALLS = 20 # Mods installed per run in the repo browser case
+STEP_TIMEOUT = 120 # Seconds before a step that never finishes fails the case
+
+
+def elapsed_ms(start):
+    return (time.perf_counter() - start) * 1000
+
+
+def wait_until(condition, timeout=STEP_TIMEOUT):
+    from PySide6.QtCore import QCoreApplication, QEventLoop
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise TimeoutError("Benchmark step timed out")
+        QCoreApplication.processEvents(QEventLoop.ProcessEventsFlag.WaitForMoreEvents, 50)
+
+
+def fill_instances(count):
+    # A fresh instances.db with count instances, written in one transaction
+    from instance_store import InstanceStore, default_db_path
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(default_db_path() + suffix):
+            os.remove(default_db_path() + suffix)
+    store = InstanceStore()
+    with store.transaction():
+        for i in range(count):
+            store.add(f"Instance {i}", f"/opt/skakavi/{i}/Skakavi-Krompir-Linux", icon_path="")
+    store.close()
+
+
+def parse_startup(text):
+    # {mark: ms} from the "Startup: imports 80.1 ms, ..." line
+    for line in text.splitlines():
+        if line.startswith("Startup: "):
+            marks = {}
+            for part in line[len("Startup: "):].split(", "):
+                name, value, unit = part.rsplit(" ", 2)
+                marks[name] = float(value)
+            return marks
+    return None
+
+
+def case_startup(record, runs):
+    # Cold starts of main.py up to the first paint of the window. The first
+    # start also writes the bytecode and instances.db, so it isn't counted.
+    command = [sys.executable, os.path.join(APP_DIR, "main.py"), "--quit-after-startup"]
+    for run in range(runs + 1):
+        start = time.perf_counter()
+        result = subprocess.run(command, cwd=APP_DIR, capture_output=True, text=True, timeout=STEP_TIMEOUT)
+        total = elapsed_ms(start)
+        marks = parse_startup(result.stderr)
+        if result.returncode != 0 or marks is None:
+            raise RuntimeError(f"main.py failed to start: {result.stderr.strip()[-500:]}")
+        if run == 0:
+            continue
+        record("imports", marks["imports"])
+        record("first_paint", marks["first paint"])
+        record("process", total)
+
+
+def case_instance_list(record, runs):
+    # Loading INSTANCE_COUNT instances and refreshing the main window's list
+    fill_instances(INSTANCE_COUNT)
+    from instance_store import InstanceManager
+    import main
+    main.window.show()
+    main.app.processEvents()
+
+    for run in range(runs):
+        start = time.perf_counter()
+        manager = InstanceManager()
+        record("load", elapsed_ms(start))
+        manager.store.close()
+
+        start = time.perf_counter()
+        main.instance_model.resync()
+        main.instance_list.doItemsLayout()
+        main.instance_list.viewport().repaint()
+        record("refresh", elapsed_ms(start))
+
+
+def case_instance_save(record, runs):
+    # Latency of single writes with INSTANCE_COUNT instances in the store
+    fill_instances(INSTANCE_COUNT)
+    from instance_store import InstanceManager
+    manager = InstanceManager()
+    step = max(1, len(manager.instances) // SAVE_SAMPLES)
+
+    for run in range(runs):
+        for i in range(SAVE_SAMPLES):
+            index = (i * step) % len(manager.instances)
+            instance = dict(manager.instances[index])
+            instance["name"] = f"Renamed {run}-{i}"
+            start = time.perf_counter()
+            manager.update_instance(index, instance)
+            record("update_instance", elapsed_ms(start))
+
+        for i in range(SAVE_SAMPLES):
+            start = time.perf_counter()
+            manager.add_instance(f"Added {run}-{i}", f"/opt/skakavi/added/{i}/game")
+            record("add_instance", elapsed_ms(start))
+
+        for i in range(SAVE_SAMPLES):
+            start = time.perf_counter()
+            manager.remove_instance(len(manager.instances) - 1)
+            record("remove_instance", elapsed_ms(start))
+    manager.store.close()
+
+
+def case_load_mods(record, runs):
+    # The instance editor's mod list on a directory with MOD_COUNT files
+    from PySide6.QtWidgets import QListWidget
+    import main
+    import modscan
+    directory = tempfile.mkdtemp(prefix="bench-mods-")
+    for i in range(MOD_COUNT):
+        disabled = ".disabled" if i % 5 == 0 else ""
+        open(os.path.join(directory, f"mod_{i:05d}.py{disabled}"), "w").close()
+    dialog = main.EditInstanceDialog(main.instance_manager)
+
+    try:
+        for run in range(runs):
+            list_widget = QListWidget()
+            dialog.mod_items.pop(directory, None)
+            modscan.scanner.invalidate(directory)
+
+            start = time.perf_counter()
+            dialog.load_mods(directory, list_widget)
+            record("initial", elapsed_ms(start))
+
+            start = time.perf_counter()
+            dialog.load_mods(directory, list_widget, force=True)
+            record("rescan_unchanged", elapsed_ms(start))
+
+            # Toggle 1% of the mods, the way the mods tab does it
+            for filename in sorted(os.listdir(directory))[::100]:
+                toggled = filename[:-len(".disabled")] if filename.endswith(".disabled") else filename + ".disabled"
+                os.rename(os.path.join(directory, filename), os.path.join(directory, toggled))
+            start = time.perf_counter()
+            dialog.load_mods(directory, list_widget, force=True)
+            record("rescan_changed", elapsed_ms(start))
+            list_widget.deleteLater()
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def case_download(record, runs):
+    # Release list and build downloads (GameDownloader) from the local server
+    import main
+    import paths
+    import launcher
+    import downloads
+    launcher.RELEASES_URL = SERVER_URL + "/releases"
+
+    for run in range(runs):
+        shutil.rmtree(paths.cache_dir("http"), ignore_errors=True)
+        launcher.releases_cache = None
+        start = time.perf_counter()
+        releases = launcher.get_releases_cache().get_all_pages(launcher.releases_first_page_url())
+        record("releases_cold", elapsed_ms(start))
+
+        start = time.perf_counter()
+        launcher.get_releases_cache().get_all_pages(launcher.releases_first_page_url(), True)
+        record("releases_revalidate", elapsed_ms(start))
+
+        # An empty bin/, so the build really is downloaded
+        shutil.rmtree(paths.bin_dir(), ignore_errors=True)
+        asset = releases[0]["assets"][0]
+        result = {}
+        downloader = main.GameDownloader(asset["browser_download_url"], asset["name"], releases[0]["tag_name"],
+                                         downloads.parse_sha256(asset["digest"]))
+        downloader.finished.connect(lambda name, path: result.setdefault("path", path))
+        downloader.error.connect(lambda err: result.setdefault("error", err))
+        start = time.perf_counter()
+        downloader.start()
+        wait_until(lambda: result)
+        total = elapsed_ms(start)
+        downloader.wait()
+        if "error" in result:
+            raise RuntimeError(result["error"])
+        record("build_download", total)
+        record("build_throughput", asset["size"] / 1024 / 1024 / (total / 1000), "MB/s")
+
+
+def case_repo_browser(record, runs):
+    # RepoBrowserDialog against the local mod repository: catalog sync,
+    # versions of a project and mod installs
+    from PySide6.QtCore import QCoreApplication
+    import main
+    import paths
+    import tasks
+    import catalog
+    import launcher
+    launcher.REPO_API_URL = SERVER_URL
+    target_dir = tempfile.mkdtemp(prefix="bench-repo-mods-")
+
+    try:
+        for run in range(runs):
+            shutil.rmtree(paths.cache_dir("catalog"), ignore_errors=True)
+            shutil.rmtree(paths.cache_dir("http"), ignore_errors=True)
+            shutil.rmtree(paths.cache_dir("mods"), ignore_errors=True) # Installs download every run
+            catalog._catalogs.clear()
+            start = time.perf_counter()
+            dialog = main.RepoBrowserDialog(target_dir)
+            wait_until(lambda: dialog.project_list.count())
+            record("catalog_cold", elapsed_ms(start))
+            dialog.done(0)
+            dialog.deleteLater()
+
+            # Opened again the list comes from the local catalog right away
+            start = time.perf_counter()
+            dialog = main.RepoBrowserDialog(target_dir)
+            record("open_warm", elapsed_ms(start))
+            tasks.pool().waitForDone() # Let the background revalidation finish first
+            QCoreApplication.processEvents()
+
+            installs_start = time.perf_counter()
+            for row in range(MOD_INSTALLS):
+                start = time.perf_counter()
+                dialog.project_list.setCurrentRow(row)
+                wait_until(lambda: dialog.version_combo.count())
+                record("versions", elapsed_ms(start))
+
+                result = {}
+                start = time.perf_counter()
+                tasks.run_task(main.install_mod, dialog.versions[0], target_dir,
+                               on_finished=lambda value: result.setdefault("done", value),
+                               on_error=lambda err: result.setdefault("error", err))
+                wait_until(lambda: result)
+                if "error" in result:
+                    raise RuntimeError(result["error"])
+                record("mod_install", elapsed_ms(start))
+            record("mod_installs_per_s", MOD_INSTALLS / (time.perf_counter() - installs_start), "1/s")
+            dialog.done(0)
+            dialog.deleteLater()
+    finally:
+        shutil.rmtree(target_dir, ignore_errors=True)
+
+
+def case_launch_status(record, runs):
+    # Launching the fake game through the Supervisor until its "playing"
+    # status shows up
+    from PySide6.QtCore import QCoreApplication
+    from supervisor import Supervisor
+    app = QCoreApplication.instance() or QCoreApplication(sys.argv)
+    instance_dir = tempfile.mkdtemp(prefix="bench-game-")
+    game_path = os.path.join(instance_dir, "game.py")
+    shutil.copy(os.path.join(BENCH_DIR, "fake_game.py"), game_path)
+
+    events = {}
+    supervisor = Supervisor(1)
+    supervisor.session_started.connect(lambda session: events.setdefault("started", time.perf_counter()))
+    supervisor.session_status.connect(
+        lambda session, text: text.startswith("Playing") and events.setdefault("status", time.perf_counter()))
+    supervisor.session_finished.connect(lambda session, text: events.setdefault("finished", time.perf_counter()))
+
+    try:
+        for run in range(runs):
+            status_path = os.path.join(instance_dir, "data", "status.json")
+            if os.path.exists(status_path):
+                os.remove(status_path)
+            events.clear()
+            start = time.perf_counter()
+            supervisor.launch(f"bench-{run}", {"id": f"bench-{run}", "name": "Benchmark", "path": game_path})
+            wait_until(lambda: "finished" in events)
+            if "status" not in events:
+                raise RuntimeError("The fake game's status never arrived")
+            record("process_start", (events["started"] - start) * 1000)
+            record("launch_to_status", (events["status"] - start) * 1000)
+            record("session", (events["finished"] - start) * 1000)
+    finally:
+        shutil.rmtree(instance_dir, ignore_errors=True)
+
+
+CASES = {
+    "startup": case_startup,
+    "instance_list": case_instance_list,
+    "instance_save": case_instance_save,
+    "load_mods": case_load_mods,
+    "download": case_download,
+    "repo_browser": case_repo_browser,
+    "launch_status": case_launch_status,
+}
+
+
+def main(argv):
+    case, runs = argv[0], int(argv[1])
+    results = {}
+
+    def record(name, value, unit="ms"):
+        results.setdefault(name, {"unit": unit, "samples": []})["samples"].append(value)
+
+    CASES[case](record, runs)
+    print(RESULT_PREFIX + json.dumps(results), flush=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
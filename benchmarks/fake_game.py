@@ -0,0 +1,25 @@
+import os
+import sys
+import json
+import time
+
+# Stands in for the game in launch benchmarks: takes the same arguments,
+# reports "playing" through data/status.json right away (the way games
+# without the status socket do) and exits after FAKE_GAME_SECONDS.
+
+
+def main(argv):
+    data_dir = argv[argv.index("--data-dir") + 1]
+    os.makedirs(data_dir, exist_ok=True)
+    status_path = os.path.join(data_dir, "status.json")
+    tmp_path = status_path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump({"state": "playing", "score": 0, "timestamp": time.time()}, f)
+    os.replace(tmp_path, status_path)
+    print("fake game started", flush=True)
+    time.sleep(float(os.environ.get("FAKE_GAME_SECONDS", "0.2")))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
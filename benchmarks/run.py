@@ -0,0 +1,200 @@
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+import statistics
+import subprocess
+
+import cases
+from server import BenchServer
+
+# Offline benchmark suite for the launcher (Linux, no display needed):
+#
+#   python benchmarks/run.py                        all cases, results JSON in benchmarks/results/
+#   python benchmarks/run.py --cases startup,download --runs 10
+#   python benchmarks/run.py --compare benchmarks/results/before.json
+#
+# Every case runs in a fresh process against a scratch copy of the source
+# tree, with Qt offscreen and HOME pointed at an empty directory. Network
+# cases talk to a local server (server.py) standing in for GitHub releases
+# and the mod repository, so nothing outside the machine is touched.
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+SOURCE_DIR = os.path.dirname(BENCH_DIR)
+RESULTS_DIR = os.path.join(BENCH_DIR, "results")
+DEFAULT_RUNS = 5
+DEFAULT_THRESHOLD = 0.10 # Relative change of a median reported as a regression
+CASE_TIMEOUT = 1800 # Seconds
+HIGHER_IS_BETTER = ("MB/s", "1/s") # Units of throughput metrics
+COPY_IGNORE = shutil.ignore_patterns(".git", "__pycache__", "*.pyc", "bin", "cache", "logs", "results",
+                                     "instances.db*", "requests.jsonl")
+
+
+def percentile(values, fraction):
+    # Nearest rank on the sorted samples
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, round(fraction * (len(ordered) - 1))))]
+
+
+def summarize(metric):
+    samples = metric["samples"]
+    return {
+        "unit": metric["unit"],
+        "count": len(samples),
+        "min": min(samples),
+        "median": statistics.median(samples),
+        "mean": statistics.fmean(samples),
+        "p95": percentile(samples, 0.95),
+        "max": max(samples),
+        "samples": samples,
+    }
+
+
+def git_revision():
+    try:
+        result = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=SOURCE_DIR,
+                                capture_output=True, text=True, timeout=10)
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=SOURCE_DIR,
+                               capture_output=True, text=True, timeout=30).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return None
+    revision = result.stdout.strip() or None
+    return f"{revision}-dirty" if revision and dirty else revision
+
+
+def qt_version():
+    try:
+        import PySide6
+        return PySide6.__version__
+    except ImportError:
+        return None
+
+
+def run_case(name, runs, app_dir, env):
+    # Returns the case's metrics summarized, or raises RuntimeError
+    command = [sys.executable, os.path.join(app_dir, "benchmarks", "cases.py"), name, str(runs)]
+    try:
+        result = subprocess.run(command, cwd=app_dir, env=env, capture_output=True, text=True, timeout=CASE_TIMEOUT)
+    except subprocess.TimeoutExpired:
+        raise RuntimeError(f"Timed out after {CASE_TIMEOUT} s")
+    for line in reversed(result.stdout.splitlines()):
+        if line.startswith(cases.RESULT_PREFIX):
+            metrics = json.loads(line[len(cases.RESULT_PREFIX):])
+            return {metric: summarize(values) for metric, values in metrics.items()}
+    lines = (result.stderr or result.stdout).strip().splitlines()
+    raise RuntimeError(lines[-1] if lines else f"Exited with {result.returncode}")
+
+
+def format_value(value, unit):
+    return f"{value:.1f} {unit}" if value >= 10 else f"{value:.3f} {unit}"
+
+
+def print_results(results):
+    for name, case in results["cases"].items():
+        if "error" in case:
+            print(f"{name}: FAILED - {case['error']}")
+            continue
+        print(f"{name} ({case['seconds']:.1f} s)")
+        for metric, values in case["metrics"].items():
+            print(f"  {metric:<22} median {format_value(values['median'], values['unit']):>14}"
+                  f"   p95 {format_value(values['p95'], values['unit']):>14}   n={values['count']}")
+
+
+def compare(base, results, threshold):
+    # Prints the change of every median found in both results and returns
+    # how many got worse by more than threshold
+    regressions = 0
+    print(f"\nCompared to {base.get('git_rev') or 'base'} ({base.get('created', '?')}):")
+    for name, case in results["cases"].items():
+        base_case = base.get("cases", {}).get(name, {})
+        for metric, values in case.get("metrics", {}).items():
+            base_values = base_case.get("metrics", {}).get(metric)
+            if not base_values or not base_values["median"]:
+                continue
+            change = (values["median"] - base_values["median"]) / base_values["median"]
+            worse = -change if values["unit"] in HIGHER_IS_BETTER else change
+            flag = ""
+            if worse > threshold:
+                flag = "  REGRESSION"
+                regressions += 1
+            elif worse < -threshold:
+                flag = "  improved"
+            print(f"  {name + '.' + metric:<36} {format_value(base_values['median'], values['unit']):>14}"
+                  f" -> {format_value(values['median'], values['unit']):>14}  {change:+7.1%}{flag}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the launcher benchmarks offline")
+    parser.add_argument("--cases", help=f"Comma separated cases (default: all of {', '.join(cases.CASES)})")
+    parser.add_argument("--runs", type=int, default=DEFAULT_RUNS, help="Repetitions per case")
+    parser.add_argument("--instances", type=int, default=cases.INSTANCE_COUNT, help="Instances in the list cases")
+    parser.add_argument("--mods", type=int, default=cases.MOD_COUNT, help="Files in the mod directory case")
+    parser.add_argument("--asset-mb", type=int, default=64, help="Size of the served game build")
+    parser.add_argument("--output", help="Results file (default: benchmarks/results/<time>.json)")
+    parser.add_argument("--compare", metavar="BASE", help="Earlier results file to compare the medians with")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="Relative change counted as a regression (default: 0.10)")
+    args = parser.parse_args(argv)
+
+    names = args.cases.split(",") if args.cases else list(cases.CASES)
+    unknown = [name for name in names if name not in cases.CASES]
+    if unknown:
+        parser.error(f"unknown case(s): {', '.join(unknown)}")
+    base = None
+    if args.compare:
+        with open(args.compare, "r") as f:
+            base = json.load(f)
+
+    results = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "git_rev": git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "qt": qt_version(),
+        "cpus": os.cpu_count(),
+        "config": {"runs": args.runs, "instances": args.instances, "mods": args.mods, "asset_mb": args.asset_mb},
+        "cases": {},
+    }
+
+    scratch = tempfile.mkdtemp(prefix="skakavi-bench-")
+    server = BenchServer(asset_size=args.asset_mb * 1024 * 1024).start()
+    try:
+        app_dir = os.path.join(scratch, "app")
+        shutil.copytree(SOURCE_DIR, app_dir, ignore=COPY_IGNORE)
+        home = os.path.join(scratch, "home")
+        os.makedirs(home)
+        env = dict(os.environ, QT_QPA_PLATFORM="offscreen", HOME=home, BENCH_SERVER_URL=server.url,
+                   BENCH_INSTANCES=str(args.instances), BENCH_MODS=str(args.mods))
+        env.pop("SKAKAVI_STARTUP_TIMING", None)
+
+        for name in names:
+            print(f"Running {name}...", file=sys.stderr, flush=True)
+            start = time.perf_counter()
+            try:
+                metrics = run_case(name, args.runs, app_dir, env)
+                results["cases"][name] = {"seconds": time.perf_counter() - start, "metrics": metrics}
+            except RuntimeError as e:
+                results["cases"][name] = {"seconds": time.perf_counter() - start, "error": str(e)}
+    finally:
+        server.stop()
+        shutil.rmtree(scratch, ignore_errors=True)
+
+    output = args.output or os.path.join(RESULTS_DIR, time.strftime("%Y%m%d-%H%M%S") + ".json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2)
+
+    print_results(results)
+    print(f"\nResults written to {output}")
+    failed = any("error" in case for case in results["cases"].values())
+    regressions = compare(base, results, args.threshold) if base else 0
+    return 1 if failed or regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,142 @@
+import re
+import json
+import hashlib
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+RELEASE_COUNT = 150 # Two pages at GitHub's per_page=100
+PROJECT_COUNT = 500
+VERSIONS_PER_PROJECT = 3
+ASSET_NAME = "Skakavi-Krompir-Linux"
+
+
+def payload(size, seed):
+    # Deterministic, incompressible enough content of the given size
+    block = hashlib.sha256(seed.encode("utf-8")).digest() * 2048
+    return (block * (size // len(block) + 1))[:size]
+
+
+class BenchServer:
+    # Local stand-in for the GitHub releases API and the mod repository
+    # (REPO_API_URL): paginated releases with ETags, /projects,
+    # /projects/<id>/versions and /download/<id>, and release assets with
+    # Range support so the segmented downloader is exercised too.
+    def __init__(self, asset_size=64 * 1024 * 1024, mod_size=256 * 1024):
+        self.asset = payload(asset_size, "asset")
+        self.mod = payload(mod_size, "mod")
+        self.asset_sha256 = hashlib.sha256(self.asset).hexdigest()
+        self.mod_sha256 = hashlib.sha256(self.mod).hexdigest()
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), self.handler_class())
+        self.httpd.daemon_threads = True
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.httpd.server_port}"
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def releases(self):
+        return [{
+            "tag_name": f"v1.{i}",
+            "name": f"Release 1.{i}",
+            "assets": [{
+                "name": ASSET_NAME,
+                "browser_download_url": f"{self.url}/assets/v1.{i}/{ASSET_NAME}",
+                "digest": f"sha256:{self.asset_sha256}",
+                "size": len(self.asset),
+            }],
+        } for i in range(RELEASE_COUNT)]
+
+    def projects(self):
+        return [{"id": i, "name": f"Mod {i}", "author": f"author{i % 17}",
+                 "description": f"Benchmark mod number {i} for the launcher"} for i in range(PROJECT_COUNT)]
+
+    def versions(self, project_id):
+        return [{"id": project_id * 10 + j, "version_number": f"1.{j}", "filename": f"mod{project_id}_{j}.py",
+                 "sha256": self.mod_sha256} for j in range(VERSIONS_PER_PROJECT)]
+
+    def handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def send_json(self, data, headers=()):
+                body = json.dumps(data).encode("utf-8")
+                etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+                if self.headers.get("If-None-Match") == etag:
+                    self.send_response(304)
+                    self.send_header("ETag", etag)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("ETag", etag)
+                for name, value in headers:
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                if self.command != "HEAD":
+                    self.wfile.write(body)
+
+            def send_file(self, data):
+                start, end = 0, len(data) - 1
+                match = re.match(r"bytes=(\d+)-(\d*)", self.headers.get("Range", ""))
+                status = 200
+                if match:
+                    start = int(match[1])
+                    end = min(int(match[2]), end) if match[2] else end
+                    status = 206
+                self.send_response(status)
+                self.send_header("Content-Type", "application/octet-stream")
+                self.send_header("Accept-Ranges", "bytes")
+                self.send_header("ETag", '"bench"')
+                if status == 206:
+                    self.send_header("Content-Range", f"bytes {start}-{end}/{len(data)}")
+                self.send_header("Content-Length", str(end - start + 1))
+                self.end_headers()
+                if self.command == "HEAD":
+                    return
+                view = memoryview(data)
+                for offset in range(start, end + 1, 256 * 1024):
+                    self.wfile.write(view[offset:min(offset + 256 * 1024, end + 1)])
+
+            def do_HEAD(self):
+                self.do_GET()
+
+            def do_GET(self):
+                path, _, query = self.path.partition("?")
+                if path == "/releases":
+                    # GitHub style pagination through the Link header
+                    match = re.search(r"(?:^|&)page=(\d+)", query)
+                    page = int(match[1]) if match else 1
+                    releases = server.releases()[(page - 1) * 100:page * 100]
+                    headers = []
+                    if page * 100 < RELEASE_COUNT:
+                        headers.append(("Link", f'<{server.url}/releases?per_page=100&page={page + 1}>; rel="next"'))
+                    return self.send_json(releases, headers)
+                if path.startswith("/assets/"):
+                    return self.send_file(server.asset)
+                if path == "/projects":
+                    return self.send_json(server.projects())
+                match = re.fullmatch(r"/projects/(\d+)/versions", path)
+                if match:
+                    return self.send_json(server.versions(int(match[1])))
+                if re.fullmatch(r"/download/\d+", path):
+                    return self.send_file(server.mod)
+                self.send_response(404)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+        return Handler
@@ -0,0 +1,202 @@
+import os
+import sys
+import json
+import errno
+import shutil
+import hashlib
+import argparse
+import threading
+
+import paths
+from instance_store import InstanceStore
+
+FICLONE = 0x40049409 # Linux ioctl to share extents between files (btrfs, xfs)
+
+
+def _reflink(src, dst):
+    import fcntl
+    with open(src, "rb") as s, open(dst, "wb") as d:
+        fcntl.ioctl(d.fileno(), FICLONE, s.fileno())
+
+
+class BlobStore:
+    # Content-addressed storage for game binaries under bin/blobs, one file per
+    # SHA-256. What instances point at are hardlinks (or reflinks / copies as a
+    # fallback) in bin/<version>/<asset>, so the same build downloaded twice is
+    # stored once and two tags with the same asset name no longer collide.
+    # bin/index.json maps download URLs to hashes and records every link.
+    def __init__(self, root=None):
+        self.root = root or paths.bin_dir()
+        self.blob_dir = os.path.join(self.root, "blobs", "sha256")
+        self.incoming_dir = os.path.join(self.root, "blobs", "incoming")
+        self.index_path = os.path.join(self.root, "index.json")
+        self.lock = threading.Lock()
+
+    def blob_path(self, sha256):
+        return os.path.join(self.blob_dir, sha256[:2], sha256)
+
+    def has(self, sha256):
+        return bool(sha256) and os.path.isfile(self.blob_path(sha256))
+
+    def incoming_path(self, url, name):
+        # Stable per URL so an interrupted download resumes on the next try
+        key = hashlib.sha1(url.encode("utf-8")).hexdigest()[:16]
+        os.makedirs(self.incoming_dir, exist_ok=True)
+        return os.path.join(self.incoming_dir, f"{key}-{name}")
+
+    def link_path(self, version_tag, name):
+        safe_tag = "".join(c if c.isalnum() or c in "._-" else "_" for c in version_tag) or "unknown"
+        return os.path.join(self.root, safe_tag, name)
+
+    def load_index(self):
+        try:
+            with open(self.index_path, "r") as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            index = {}
+        index.setdefault("urls", {})
+        index.setdefault("links", {})
+        return index
+
+    def save_index(self, index):
+        os.makedirs(self.root, exist_ok=True)
+        tmp_path = self.index_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(index, f, indent=4)
+        os.replace(tmp_path, self.index_path)
+
+    def lookup(self, url):
+        sha256 = self.load_index()["urls"].get(url)
+        return sha256 if self.has(sha256) else None
+
+    def add(self, file_path, sha256, url=None):
+        # Moves an already verified file into the store
+        blob_path = self.blob_path(sha256)
+        os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+        if os.path.exists(blob_path):
+            os.remove(file_path)
+        else:
+            os.replace(file_path, blob_path)
+            if sys.platform != "win32":
+                os.chmod(blob_path, 0o755)
+
+        if url:
+            with self.lock:
+                index = self.load_index()
+                index["urls"][url] = sha256
+                self.save_index(index)
+        return blob_path
+
+    def link(self, sha256, target_path):
+        blob_path = self.blob_path(sha256)
+        os.makedirs(os.path.dirname(target_path), exist_ok=True)
+
+        if os.path.exists(target_path):
+            if os.path.samefile(blob_path, target_path):
+                self._record_link(target_path, sha256)
+                return target_path
+            os.remove(target_path)
+
+        try:
+            os.link(blob_path, target_path)
+        except OSError:
+            try:
+                _reflink(blob_path, target_path)
+            except (OSError, ImportError):
+                shutil.copyfile(blob_path, target_path)
+            if sys.platform != "win32":
+                os.chmod(target_path, 0o755)
+
+        self._record_link(target_path, sha256)
+        return target_path
+
+    def _record_link(self, target_path, sha256):
+        with self.lock:
+            index = self.load_index()
+            index["links"][os.path.relpath(target_path, self.root)] = sha256
+            self.save_index(index)
+
+    def blobs(self):
+        if not os.path.isdir(self.blob_dir):
+            return
+        for prefix in os.scandir(self.blob_dir):
+            if prefix.is_dir():
+                for entry in os.scandir(prefix.path):
+                    if entry.is_file():
+                        yield entry
+
+    def gc(self, referenced_paths, dry_run=False):
+        # Removes launcher-managed links that no instance points at and every
+        # blob left without a referencing instance. Returns (files, bytes).
+        referenced = set()
+        for path in referenced_paths:
+            if path and os.path.exists(path):
+                referenced.add(os.path.normcase(os.path.realpath(path)))
+
+        removed_files = 0
+        freed = 0
+        with self.lock:
+            index = self.load_index()
+            live_hashes = set()
+            for rel_path, sha256 in list(index["links"].items()):
+                link_path = os.path.join(self.root, rel_path)
+                if os.path.normcase(os.path.realpath(link_path)) in referenced:
+                    live_hashes.add(sha256)
+                    continue
+                if not dry_run:
+                    try:
+                        os.remove(link_path)
+                        os.rmdir(os.path.dirname(link_path))
+                    except OSError:
+                        pass # Already gone, or the version dir still has other files
+                    del index["links"][rel_path]
+                removed_files += 1
+
+            # Instances may also point straight at a hardlink the index does
+            # not know about, so compare inodes too
+            referenced_inodes = set()
+            for path in referenced:
+                st = os.stat(path)
+                referenced_inodes.add((st.st_dev, st.st_ino))
+
+            for entry in list(self.blobs()):
+                st = entry.stat()
+                if entry.name in live_hashes or (st.st_dev, st.st_ino) in referenced_inodes:
+                    continue
+                if not dry_run:
+                    try:
+                        os.remove(entry.path)
+                    except OSError as e:
+                        if e.errno != errno.ENOENT:
+                            raise
+                removed_files += 1
+                freed += st.st_size
+
+            if not dry_run:
+                index["urls"] = {url: sha256 for url, sha256 in index["urls"].items() if self.has(sha256)}
+                self.save_index(index)
+
+        return removed_files, freed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Manage the launcher's game binary store")
+    parser.add_argument("--root", default=paths.bin_dir(), help="Store directory (default: bin/ next to the launcher)")
+    sub = parser.add_subparsers(dest="command", required=True)
+    gc_parser = sub.add_parser("gc", help="Delete binaries no instance references")
+    gc_parser.add_argument("--db", default=None, help="Instance database (default: instances.db next to the launcher)")
+    gc_parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args(argv)
+
+    if args.command == "gc":
+        store = InstanceStore(args.db)
+        instances = store.all()
+        store.close()
+        files, freed = BlobStore(args.root).gc([inst.get("path") for inst in instances], args.dry_run)
+        action = "Would remove" if args.dry_run else "Removed"
+        print(f"{action} {files} files, {freed / (1024 * 1024):.1f} MiB")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,172 @@
+import os
+import re
+import json
+import time
+import bisect
+import hashlib
+import threading
+
+import paths
+from http_cache import HttpCache
+
+TOKEN_RE = re.compile(r"\w+")
+SEARCH_FIELDS = ("name", "author", "description")
+
+_catalogs = {}
+_catalogs_lock = threading.Lock()
+
+
+def tokenize(text):
+    return TOKEN_RE.findall(str(text or "").lower())
+
+
+class SearchIndex:
+    # Inverted index from token to project ids. Tokens are also kept sorted so
+    # a partially typed word matches every token it is a prefix of.
+    def __init__(self, projects=()):
+        self.postings = {}
+        self.names = {}
+        for project in projects:
+            self.add(project)
+        self.tokens = sorted(self.postings)
+
+    def add(self, project):
+        project_id = project["id"]
+        self.names[project_id] = str(project.get("name", "")).lower()
+        for field in SEARCH_FIELDS:
+            for token in tokenize(project.get(field)):
+                self.postings.setdefault(token, set()).add(project_id)
+
+    def prefix_matches(self, prefix):
+        ids = set()
+        i = bisect.bisect_left(self.tokens, prefix)
+        while i < len(self.tokens) and self.tokens[i].startswith(prefix):
+            ids |= self.postings[self.tokens[i]]
+            i += 1
+        return ids
+
+    def search(self, query):
+        # Every query word has to match (as a prefix) somewhere in the project.
+        # Returns ids with name matches first, then alphabetically.
+        words = tokenize(query)
+        if not words:
+            return sorted(self.names, key=lambda project_id: self.names[project_id])
+
+        result = None
+        for word in words:
+            ids = self.prefix_matches(word)
+            result = ids if result is None else result & ids
+            if not result:
+                return []
+
+        first = words[0]
+        return sorted(result, key=lambda project_id: (first not in self.names[project_id], self.names[project_id]))
+
+
+class Catalog:
+    # Local copy of the mod repository's projects and versions. It is loaded
+    # from disk so browsing and search work offline, and synced from the API
+    # in the background with conditional requests.
+    def __init__(self, base_url, path=None):
+        self.base_url = base_url.rstrip("/")
+        if path is None:
+            key = hashlib.sha1(self.base_url.encode("utf-8")).hexdigest()
+            path = paths.cache_dir("catalog", key + ".json")
+        self.path = path
+        self.http = HttpCache(paths.cache_dir("http"), ttl=0)
+        self.lock = threading.Lock()
+        self.projects = {}
+        self.versions = {}
+        self.synced_at = 0
+        self.index = SearchIndex()
+        self.load()
+
+    def load(self):
+        try:
+            with open(self.path, "r") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+
+        projects = {project["id"]: project for project in data.get("projects", [])}
+        # JSON object keys are strings, map them back to the project ids
+        by_key = {str(project_id): project_id for project_id in projects}
+        versions = {by_key[key]: value for key, value in data.get("versions", {}).items() if key in by_key}
+        self.replace(projects, versions, data.get("synced_at", 0))
+
+    def save(self):
+        with self.lock:
+            data = {
+                "base_url": self.base_url,
+                "synced_at": self.synced_at,
+                "projects": list(self.projects.values()),
+                "versions": {str(project_id): versions for project_id, versions in self.versions.items()},
+            }
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = f"{self.path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, self.path)
+
+    def replace(self, projects, versions, synced_at):
+        index = SearchIndex(projects.values())
+        with self.lock:
+            self.projects = projects
+            self.versions = versions
+            self.synced_at = synced_at
+            self.index = index
+
+    def is_empty(self):
+        return not self.projects
+
+    def get_project(self, project_id):
+        return self.projects.get(project_id)
+
+    def search(self, query=""):
+        with self.lock:
+            index = self.index
+            projects = self.projects
+        return [projects[project_id] for project_id in index.search(query) if project_id in projects]
+
+    def cached_versions(self, project_id):
+        return self.versions.get(project_id)
+
+    def sync(self):
+        # Returns True when the project list changed. Versions of projects that
+        # changed or disappeared are dropped and fetched again on demand.
+        remote = self.http.get_json(f"{self.base_url}/projects")
+        projects = {project["id"]: project for project in remote}
+
+        with self.lock:
+            old_projects = self.projects
+            old_versions = self.versions
+        changed = projects != old_projects
+        versions = {
+            project_id: value for project_id, value in old_versions.items()
+            if project_id in projects and projects[project_id] == old_projects.get(project_id)
+        }
+
+        if changed:
+            self.replace(projects, versions, time.time())
+        else:
+            with self.lock:
+                self.synced_at = time.time()
+        self.save()
+        return changed
+
+    def fetch_versions(self, project_id):
+        versions = self.http.get_json(f"{self.base_url}/projects/{project_id}/versions")
+        with self.lock:
+            changed = self.versions.get(project_id) != versions
+            self.versions[project_id] = versions
+        if changed:
+            self.save()
+        return versions
+
+
+def get_catalog(base_url):
+    with _catalogs_lock:
+        catalog = _catalogs.get(base_url)
+        if catalog is None:
+            catalog = _catalogs[base_url] = Catalog(base_url)
+        return catalog
@@ -0,0 +1,528 @@
+import os
+import sys
+import json
+import signal
+import argparse
+import threading
+import subprocess
+
+import launcher
+import tracing
+import launch_history
+import game_settings
+from instance_store import InstanceStore
+
+COMMANDS = ("list", "launch", "launch-stats", "download", "install-mod", "prefetch-mods", "settings", "apply-settings",
+            "gc")
+
+
+class CommandError(Exception):
+    pass
+
+
+class ProgressPrinter:
+    # Download progress on stderr, redrawn in place on a terminal and left out
+    # of redirected output (CI logs)
+    def __init__(self, label):
+        self.label = label
+        self.enabled = sys.stderr.isatty()
+        self.last_percent = -1
+        self.lock = threading.Lock()
+
+    def __call__(self, done, total):
+        if not self.enabled or total <= 0:
+            return
+        percent = int(done * 100 / total)
+        with self.lock:
+            if percent != self.last_percent:
+                self.last_percent = percent
+                print(f"\r{self.label} {percent}%", end="", file=sys.stderr, flush=True)
+
+    def finish(self):
+        if self.enabled and self.last_percent >= 0:
+            print(file=sys.stderr)
+
+
+def run_download(label, fn, *args, **kwargs):
+    # Downloads run on a worker thread so Ctrl+C can cancel them cleanly (the
+    # partial file is kept and resumed next time)
+    progress = ProgressPrinter(label)
+    cancel = threading.Event()
+    result = {}
+
+    def work():
+        try:
+            result["value"] = fn(*args, progress=progress, cancel=cancel, **kwargs)
+        except BaseException as e:
+            result["error"] = e
+
+    thread = threading.Thread(target=work, daemon=True)
+    thread.start()
+    try:
+        while thread.is_alive():
+            thread.join(0.2)
+    except KeyboardInterrupt:
+        cancel.set()
+        thread.join()
+        raise
+    finally:
+        progress.finish()
+    if "error" in result:
+        raise result["error"]
+    return result["value"]
+
+
+def find_instance(store, ref):
+    try:
+        return launcher.find_instance(store.all(), ref)
+    except LookupError as e:
+        raise CommandError(str(e))
+
+
+def cmd_list(args, store):
+    instances = store.all()
+    if args.json:
+        print(json.dumps(instances, indent=4))
+        return 0
+    for inst in instances:
+        print(f"{inst['id'][:8]}  {inst['name']}  {inst['path']}")
+    return 0
+
+
+def cmd_launch(args, store):
+    instances = [find_instance(store, ref) for ref in args.instances]
+    instances = list({inst["id"]: inst for inst in instances}.values())
+    if args.detach:
+        return launch_detached(instances)
+    return launch_and_wait(instances, args.max_concurrent, args.timeout, args.status, args.quiet)
+
+
+def launch_detached(instances):
+    for inst in instances:
+        working_dir = os.path.dirname(inst["path"])
+        data_dir = os.path.join(working_dir, "data")
+        os.makedirs(data_dir, exist_ok=True)
+        program, game_args = launcher.game_command(inst["path"], data_dir)
+        kwargs = {}
+        if sys.platform == "win32":
+            kwargs["creationflags"] = subprocess.DETACHED_PROCESS | subprocess.CREATE_NEW_PROCESS_GROUP
+        else:
+            kwargs["start_new_session"] = True
+        try:
+            process = subprocess.Popen([program] + game_args, cwd=working_dir, stdin=subprocess.DEVNULL,
+                                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, **kwargs)
+        except OSError as e:
+            raise CommandError(f"Failed to start {inst['name']}: {e}")
+        print(f"{inst['name']}: pid {process.pid}")
+    return 0
+
+
+def launch_and_wait(instances, max_concurrent, timeout, show_status, quiet):
+    # The same Supervisor the GUI uses (session logs, status channel, process
+    # groups), driven by a QCoreApplication instead of widgets
+    from PySide6.QtCore import QCoreApplication, QTimer
+    from logstream import LogStream
+    from supervisor import Supervisor
+
+    app = QCoreApplication.instance() or QCoreApplication([sys.argv[0]])
+    supervisor = Supervisor(max_concurrent)
+    prefixed = len(instances) > 1
+    streams = {}
+    failed = []
+    remaining = [len(instances)]
+
+    def write_lines(session, stream):
+        lines, dropped = stream.take()
+        if dropped:
+            lines.insert(0, f"[... {dropped} lines dropped ...]")
+        if lines:
+            sys.stdout.write("".join(f"[{session.name}] {line}\n" for line in lines))
+            sys.stdout.flush()
+
+    def on_output(session, channel, data):
+        if quiet:
+            return
+        if not prefixed:
+            out = sys.stdout if channel == "stdout" else sys.stderr
+            out.buffer.write(data)
+            out.flush()
+            return
+        stream = streams.setdefault(session.key, LogStream())
+        stream.feed(data, channel)
+        write_lines(session, stream)
+
+    def on_status(session, text):
+        if show_status:
+            print(f"[{session.name}] {text}", file=sys.stderr, flush=True)
+
+    def on_launch_recorded(session, entry, alert):
+        if show_status:
+            print(f"[{session.name}] Startup: {launch_history.format_phases(entry['phases'])}", file=sys.stderr, flush=True)
+        if alert:
+            print(f"[{session.name}] {alert}", file=sys.stderr, flush=True)
+
+    def on_finished(session, text):
+        stream = streams.pop(session.key, None)
+        if stream:
+            stream.close()
+            write_lines(session, stream)
+        if text != "Finished":
+            failed.append(session.name)
+        if not quiet:
+            print(f"[{session.name}] {text}", file=sys.stderr, flush=True)
+        remaining[0] -= 1
+        if not remaining[0]:
+            app.quit()
+
+    supervisor.session_output.connect(on_output)
+    supervisor.session_status.connect(on_status)
+    supervisor.session_finished.connect(on_finished)
+    supervisor.launch_recorded.connect(on_launch_recorded)
+
+    # Ctrl+C kills the games; the timer lets Python run the handler while
+    # Qt's event loop has control
+    signal.signal(signal.SIGINT, lambda *args: supervisor.kill_all())
+    signal_timer = QTimer()
+    signal_timer.start(200)
+    signal_timer.timeout.connect(lambda: None)
+    if timeout:
+        QTimer.singleShot(int(timeout * 1000), supervisor.kill_all)
+
+    supervisor.launch_many((inst["id"], inst) for inst in instances)
+    if remaining[0]:
+        app.exec()
+    return 1 if failed else 0
+
+
+def cmd_launch_stats(args, store):
+    instance = find_instance(store, args.instance)
+    data_dir = launcher.instance_data_dir(instance)
+    entries = launch_history.load(data_dir) if data_dir else []
+    if args.last:
+        entries = entries[-args.last:]
+    if args.json:
+        groups = [{"binary": binary, "launches": len(launches), "summary": launch_history.summarize(launches)}
+                  for binary, launches in launch_history.by_binary(entries)]
+        print(json.dumps({"summary": launch_history.summarize(entries), "binaries": groups,
+                          "launches": entries}, indent=4))
+        return 0
+    if not entries:
+        print(f"{instance['name']}: no launches recorded")
+        return 0
+
+    def print_summary(summary, indent):
+        for phase in launch_history.PHASES:
+            if phase in summary:
+                values = summary[phase]
+                print(f"{indent}{launch_history.PHASE_LABELS[phase]:<14} p50 {launch_history.format_ms(values['p50']):>9}"
+                      f"  p95 {launch_history.format_ms(values['p95']):>9}  ({values['count']})")
+
+    print(f"{instance['name']}: {len(entries)} launches")
+    print_summary(launch_history.summarize(entries), "  ")
+    groups = launch_history.by_binary(entries)
+    if len(groups) > 1:
+        for binary, launches in groups:
+            print(f"  Build {binary or 'unknown'}, {len(launches)} launches")
+            print_summary(launch_history.summarize(launches), "    ")
+    last = entries[-1]
+    print(f"  Last: {launch_history.format_phases(last['phases'])} ({last.get('outcome')})")
+    return 0
+
+
+def find_release(releases, tag):
+    if not releases:
+        raise CommandError("No releases available")
+    if tag is None:
+        return releases[0]
+    for release in releases:
+        if release["tag_name"] == tag:
+            return release
+    raise CommandError(f"No release '{tag}'")
+
+
+def cmd_download(args, store):
+    cache = launcher.get_releases_cache()
+    url = launcher.releases_first_page_url()
+    try:
+        releases = cache.get_all_pages(url, args.refresh)
+    except Exception as e:
+        releases = cache.peek_all_pages(url)
+        if not releases:
+            raise CommandError(f"Failed to fetch releases: {e}")
+        print(f"Offline, using cached releases ({e})", file=sys.stderr)
+
+    release = find_release(releases, args.tag)
+    asset_name = args.asset or launcher.default_asset_name()
+    asset = next((asset for asset in release.get("assets", []) if asset["name"] == asset_name), None)
+    if asset is None:
+        available = ", ".join(asset["name"] for asset in release.get("assets", [])) or "none"
+        raise CommandError(f"Release {release['tag_name']} has no asset '{asset_name}' (available: {available})")
+
+    try:
+        name, path = run_download(f"Downloading {asset['name']}", launcher.install_build, asset["browser_download_url"],
+                                  asset["name"], release["tag_name"], asset.get("digest"),
+                                  release_assets=release.get("assets"))
+    except Exception as e:
+        raise CommandError(f"Failed to download: {e}")
+    if args.no_add:
+        print(path)
+        return 0
+
+    existing = store.find_by_path(path)
+    instance = existing[0] if existing else store.add(args.name or name, path)
+    print(f"{instance['id'][:8]}  {instance['name']}  {instance['path']}")
+    return 0
+
+
+def find_project(repo_catalog, ref):
+    for project in repo_catalog.search(""):
+        if str(project["id"]) == ref or project["name"].casefold() == ref.casefold():
+            return project
+    matches = repo_catalog.search(ref)
+    if len(matches) == 1:
+        return matches[0]
+    if matches:
+        names = ", ".join(project["name"] for project in matches[:10])
+        raise CommandError(f"'{ref}' matches several projects: {names}")
+    raise CommandError(f"No project '{ref}'")
+
+
+def synced_catalog():
+    import catalog
+    repo_catalog = catalog.get_catalog(launcher.REPO_API_URL)
+    try:
+        repo_catalog.sync()
+    except Exception as e:
+        if repo_catalog.is_empty():
+            raise CommandError(f"Failed to fetch projects: {e}")
+        print(f"Offline, using the last synced catalog ({e})", file=sys.stderr)
+    return repo_catalog
+
+
+def find_version(repo_catalog, project_ref, version_ref=None):
+    project = find_project(repo_catalog, project_ref)
+    try:
+        versions = repo_catalog.fetch_versions(project["id"])
+    except Exception as e:
+        versions = repo_catalog.cached_versions(project["id"])
+        if versions is None:
+            raise CommandError(f"Failed to fetch versions: {e}")
+
+    if version_ref:
+        version = next((v for v in versions if version_ref in (v.get("version_number"), str(v["id"]))), None)
+        if version is None:
+            raise CommandError(f"{project['name']} has no version '{version_ref}'")
+        return version
+    if versions:
+        return versions[0] # What the repository browser preselects
+    raise CommandError(f"{project['name']} has no versions")
+
+
+def cmd_install_mod(args, store):
+    version = find_version(synced_catalog(), args.project, args.version)
+    if args.instance:
+        target_dirs = [launcher.instance_mod_dir(find_instance(store, ref)) for ref in args.instance]
+    else:
+        target_dirs = [launcher.global_mod_dir()]
+    # Every instance after the first is served from the mod cache
+    for target_dir in target_dirs:
+        try:
+            run_download(f"Downloading {version['filename']}", launcher.install_mod, version, target_dir)
+        except Exception as e:
+            raise CommandError(f"Failed to download mod: {e}")
+        print(os.path.join(target_dir, version["filename"]))
+    return 0
+
+
+def cmd_prefetch_mods(args, store):
+    # Fills the mod cache ahead of installs, e.g. before setting up a modpack
+    # on many instances or going offline
+    import mod_cache
+    from concurrent.futures import ThreadPoolExecutor
+    repo_catalog = synced_catalog()
+    versions = []
+    for ref in args.mods:
+        project_ref, _, version_ref = ref.partition("@")
+        versions.append(find_version(repo_catalog, project_ref, version_ref or None))
+
+    def fetch(version):
+        try:
+            return version, "cached" if launcher.prefetch_mod(version) else "downloaded", None
+        except Exception as e:
+            return version, "failed", e
+
+    failed = 0
+    with ThreadPoolExecutor(max_workers=max(1, args.workers)) as executor:
+        for version, status, error in executor.map(fetch, versions):
+            print(f"{version['filename']}: {status}" + (f" ({error})" if error else ""))
+            failed += status == "failed"
+    count, size = mod_cache.get_cache().usage()
+    print(f"Mod cache: {count} artifacts, {size / 1024 / 1024:.1f} MiB of {mod_cache.MOD_CACHE_SIZE / 1024 / 1024:.0f} MiB")
+    return 1 if failed else 0
+
+
+def parse_assignments(assignments):
+    changes = {}
+    for assignment in assignments:
+        key, sep, value = assignment.partition("=")
+        if not sep:
+            raise CommandError(f"Expected KEY=VALUE, got '{assignment}'")
+        changes[key] = value
+    try:
+        return game_settings.validate(changes)
+    except game_settings.SettingsError as e:
+        raise CommandError(str(e))
+
+
+def cmd_settings(args, store):
+    instance = find_instance(store, args.instance)
+    directory = launcher.instance_dir(instance)
+    if not directory:
+        raise CommandError(f"{instance['name']} has no binary path")
+    path = game_settings.settings_path(directory)
+    try:
+        if not args.assignments:
+            print(game_settings.format_settings(game_settings.read(path)), end="")
+            return 0
+        status = game_settings.apply(path, parse_assignments(args.assignments))
+    except (OSError, ValueError) as e:
+        raise CommandError(f"Error with {path}: {e}")
+    print(f"{instance['name']}: {status}")
+    return 0
+
+
+def cmd_apply_settings(args, store):
+    if args.all:
+        instances = store.all()
+    elif args.instances:
+        instances = [find_instance(store, ref) for ref in args.instances]
+    else:
+        raise CommandError("Name the instances to change, or pass --all")
+    instances = [inst for inst in instances if launcher.instance_dir(inst)]
+
+    changes = {}
+    if args.profile:
+        try:
+            changes.update(game_settings.load_profile(args.profile))
+        except (OSError, ValueError) as e:
+            raise CommandError(f"Failed to load profile: {e}")
+    changes.update(parse_assignments(args.set or []))
+    if not changes:
+        raise CommandError("Nothing to apply, pass --profile and/or --set KEY=VALUE")
+    try:
+        changes = game_settings.validate(changes)
+    except game_settings.SettingsError as e:
+        raise CommandError(str(e))
+
+    paths = [game_settings.settings_path(launcher.instance_dir(inst)) for inst in instances]
+    results = game_settings.bulk_apply(paths, changes, workers=args.workers)
+    failed = 0
+    for inst, (path, status, error) in zip(instances, results):
+        print(f"{inst['id'][:8]}  {inst['name']}: {status}" + (f" ({error})" if error else ""))
+        failed += status == "failed"
+    return 1 if failed else 0
+
+
+def cmd_gc(args, store):
+    import blobstore
+    return blobstore.main(["gc", "--db", store.db_path] + (["--dry-run"] if args.dry_run else []))
+
+
+def build_parser():
+    # Options every command takes, accepted after the command name
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--db", default=None, help="Instance database (default: instances.db next to the launcher)")
+    common.add_argument("--trace", nargs="?", const="", metavar="PATH",
+                        help="Write a Chrome trace of the command (chrome://tracing, ui.perfetto.dev)")
+    # Not --profile like the GUI, apply-settings already uses that
+    common.add_argument("--cprofile", nargs="?", const="", metavar="PATH", help="Run the command under cProfile")
+
+    parser = argparse.ArgumentParser(prog="skakavi", description="Skakavi Krompir launcher, without the GUI")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    list_parser = sub.add_parser("list", parents=[common], help="List instances")
+    list_parser.add_argument("--json", action="store_true", help="Print every field as JSON")
+    list_parser.set_defaults(handler=cmd_list)
+
+    launch_parser = sub.add_parser("launch", parents=[common], help="Launch instances and wait for them to exit")
+    launch_parser.add_argument("instances", nargs="+", metavar="INSTANCE", help="Instance id, id prefix or name")
+    launch_parser.add_argument("--detach", action="store_true", help="Start the games and return right away")
+    launch_parser.add_argument("--max-concurrent", type=int, default=int(os.environ.get("SKAKAVI_MAX_INSTANCES", 4)),
+                               help="Games running at once, the rest wait (default: 4)")
+    launch_parser.add_argument("--timeout", type=float, default=None, help="Kill games still running after this many seconds")
+    launch_parser.add_argument("--status", action="store_true", help="Print game status updates to stderr")
+    launch_parser.add_argument("--quiet", action="store_true", help="Don't print game output")
+    launch_parser.set_defaults(handler=cmd_launch)
+
+    stats_parser = sub.add_parser("launch-stats", parents=[common],
+                                  help="Show how long an instance's launches took, per phase and build")
+    stats_parser.add_argument("instance", help="Instance id, id prefix or name")
+    stats_parser.add_argument("--last", type=int, default=None, help="Only the newest N launches")
+    stats_parser.add_argument("--json", action="store_true", help="Print the summaries and launches as JSON")
+    stats_parser.set_defaults(handler=cmd_launch_stats)
+
+    download_parser = sub.add_parser("download", parents=[common], help="Download a game release and add it as an instance")
+    download_parser.add_argument("tag", nargs="?", help="Release tag (default: latest)")
+    download_parser.add_argument("--asset", help="Asset name (default: the build for this platform)")
+    download_parser.add_argument("--name", help="Instance name")
+    download_parser.add_argument("--no-add", action="store_true", help="Only download, print the path")
+    download_parser.add_argument("--refresh", action="store_true",
+                                 help="Revalidate cached release data (kept for $SKAKAVI_RELEASES_TTL seconds, default 300)")
+    download_parser.set_defaults(handler=cmd_download)
+
+    mod_parser = sub.add_parser("install-mod", parents=[common], help="Install a mod from the mod repository")
+    mod_parser.add_argument("project", help="Project id or name")
+    mod_parser.add_argument("--version", help="Version number or id (default: the first listed)")
+    mod_parser.add_argument("--instance", action="append",
+                            help="Install into this instance instead of the global mods, may be repeated")
+    mod_parser.set_defaults(handler=cmd_install_mod)
+
+    prefetch_parser = sub.add_parser("prefetch-mods", parents=[common],
+                                     help="Download mods into the local mod cache without installing them")
+    prefetch_parser.add_argument("mods", nargs="+", metavar="PROJECT[@VERSION]",
+                                 help="Project id or name, optionally with a version number or id")
+    prefetch_parser.add_argument("--workers", type=int, default=4, help="Downloads at once")
+    prefetch_parser.set_defaults(handler=cmd_prefetch_mods)
+
+    settings_parser = sub.add_parser("settings", parents=[common], help="Show or change an instance's game settings")
+    settings_parser.add_argument("instance", help="Instance id, id prefix or name")
+    settings_parser.add_argument("assignments", nargs="*", metavar="KEY=VALUE")
+    settings_parser.set_defaults(handler=cmd_settings)
+
+    apply_parser = sub.add_parser("apply-settings", parents=[common],
+                                  help="Write a settings profile or single values to many instances at once")
+    apply_parser.add_argument("instances", nargs="*", metavar="INSTANCE", help="Instance id, id prefix or name")
+    apply_parser.add_argument("--all", action="store_true", help="Every instance")
+    apply_parser.add_argument("--profile", help="File of KEY=VALUE lines, all of them are applied")
+    apply_parser.add_argument("--set", action="append", metavar="KEY=VALUE", help="A value to apply, may be repeated")
+    apply_parser.add_argument("--workers", type=int, default=game_settings.BULK_WORKERS, help="Files written at once")
+    apply_parser.set_defaults(handler=cmd_apply_settings)
+
+    gc_parser = sub.add_parser("gc", parents=[common], help="Delete game binaries no instance references")
+    gc_parser.add_argument("--dry-run", action="store_true")
+    gc_parser.set_defaults(handler=cmd_gc)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    tracing.configure([])
+    if args.trace is not None:
+        tracing.start(args.trace or None)
+    if args.cprofile is not None:
+        tracing.enable_profile(args.cprofile or None)
+
+    store = InstanceStore(args.db)
+    try:
+        return tracing.profiled(args.handler, args, store)
+    except CommandError as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+    except KeyboardInterrupt:
+        return 130
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,50 @@
+import os
+import sys
+import shutil
+import subprocess
+import xml.etree.ElementTree as ET
+
+import paths
+
+INDEX_MODULE = "ui_compiled.py"
+
+
+def find_uic():
+    uic = shutil.which("pyside6-uic")
+    if uic:
+        return [uic]
+    return [sys.executable, "-m", "PySide6.scripts.pyside_tool", "uic"]
+
+
+def compile_all(directory=None):
+    # Compiles every .ui next to the launcher into ui_<name>.py and writes
+    # ui_compiled.py, which maps .ui file names to them. The imports there are
+    # static so freezers pick the forms up.
+    directory = directory or paths.app_dir()
+    uic = find_uic()
+    forms = []
+    for name in sorted(os.listdir(directory)):
+        if not name.endswith(".ui"):
+            continue
+        root = ET.parse(os.path.join(directory, name)).getroot().find("widget")
+        module = "ui_" + name[:-len(".ui")]
+        form_class = "Ui_" + root.get("name")
+        subprocess.run(uic + [os.path.join(directory, name), "-o", os.path.join(directory, module + ".py")], check=True)
+        forms.append((name, module, form_class, root.get("class")))
+        print(f"Compiled {name} -> {module}.py")
+
+    # Each form is imported on first use, since importing a compiled form
+    # initializes every Qt type it names
+    lines = ["# Generated by compile_ui.py, do not edit", ""]
+    for name, module, form_class, widget_class in forms:
+        lines += [f"def {module}():", f"    from {module} import {form_class}", f"    return {form_class}", "", ""]
+    lines += ["FORMS = {"]
+    lines += [f"    {name!r}: ({module}, {widget_class!r})," for name, module, form_class, widget_class in forms]
+    lines += ["}", ""]
+    with open(os.path.join(directory, INDEX_MODULE), "w") as f:
+        f.write("\n".join(lines))
+    return len(forms)
+
+
+if __name__ == "__main__":
+    compile_all(sys.argv[1] if len(sys.argv) > 1 else None)
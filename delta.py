@@ -0,0 +1,140 @@
+import os
+import hashlib
+
+import downloads
+
+# Delta updates of game builds. A release may publish binary patches next to
+# its assets, named <asset>.from-<older tag>.bsdiff (bsdiff4) or
+# <asset>.from-<older tag>.zst (zstd --patch-from, the older build being the
+# dictionary). When the blob store has one of those older builds the patch is
+# downloaded instead of the whole asset, applied locally and the result
+# checked against the release's SHA-256. SKAKAVI_PATCH_SOURCE may name a
+# directory or base URL holding patches with the same names (a LAN mirror,
+# or patches built locally). Both libraries are optional, formats whose
+# library is missing are skipped.
+
+PATCH_SOURCE_ENV = "SKAKAVI_PATCH_SOURCE"
+PATCH_MAX_WINDOW = 1 << 31 # Largest zstd window accepted, patch-from windows cover the whole build
+
+
+class PatchError(Exception):
+    pass
+
+
+def apply_bsdiff(old_path, patch_path, out_path):
+    import bsdiff4
+    bsdiff4.file_patch(old_path, out_path, patch_path)
+
+
+def apply_zstd(old_path, patch_path, out_path):
+    import zstandard
+    with open(old_path, "rb") as f:
+        dictionary = zstandard.ZstdCompressionDict(f.read(), dict_type=zstandard.DICT_TYPE_RAWCONTENT)
+    decompressor = zstandard.ZstdDecompressor(dict_data=dictionary, max_window_size=PATCH_MAX_WINDOW)
+    with open(patch_path, "rb") as source, open(out_path, "wb") as target:
+        decompressor.copy_stream(source, target)
+
+
+FORMATS = {
+    ".bsdiff": ("bsdiff4", apply_bsdiff),
+    ".zst": ("zstandard", apply_zstd),
+}
+
+
+def available_formats():
+    # Extensions whose library can be imported, in order of preference
+    extensions = []
+    for extension, (module, apply) in FORMATS.items():
+        try:
+            __import__(module)
+        except ImportError:
+            continue
+        extensions.append(extension)
+    return extensions
+
+
+def patch_name(asset_name, from_tag, extension):
+    return f"{asset_name}.from-{from_tag}{extension}"
+
+
+def installed_builds(store, asset_name):
+    # [(tag, sha256)] of the builds of this asset still in the blob store,
+    # newest first
+    builds = {}
+    for rel_path, sha256 in store.load_index()["links"].items():
+        tag, name = os.path.split(rel_path)
+        if name == asset_name and tag and store.has(sha256):
+            builds.setdefault(sha256, tag)
+    return sorted(((tag, sha256) for sha256, tag in builds.items()),
+                  key=lambda build: os.path.getmtime(store.blob_path(build[1])), reverse=True)
+
+
+def find_patches(asset_name, builds, published):
+    # Candidate patches as (tag, source sha256, location, patch sha256 or
+    # None, extension), the release's own before the patch source. published
+    # maps the release's asset names to its assets.
+    source = os.environ.get(PATCH_SOURCE_ENV)
+    release_patches = []
+    source_patches = []
+    for extension in available_formats():
+        for tag, sha256 in builds:
+            name = patch_name(asset_name, tag, extension)
+            asset = published.get(name)
+            if asset:
+                release_patches.append((tag, sha256, asset["browser_download_url"],
+                                        downloads.parse_sha256(asset.get("digest")), extension))
+            if source and source.startswith(("http://", "https://")):
+                source_patches.append((tag, sha256, f"{source.rstrip('/')}/{name}", None, extension))
+            elif source and os.path.isfile(os.path.join(source, name)):
+                source_patches.append((tag, sha256, os.path.join(source, name), None, extension))
+    return release_patches + source_patches
+
+
+def file_sha256(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def update(store, download_url, asset_name, sha256, published, progress=None, cancel=None):
+    # Builds the asset from an installed older build and a patch, adds it to
+    # the store and returns its SHA-256. Returns None when no patch applies,
+    # and raises (PatchError, download errors) when one was tried and failed,
+    # so the caller falls back to the full download. Without the expected
+    # SHA-256 nothing can be verified, so nothing is patched.
+    if not sha256:
+        return None
+    builds = installed_builds(store, asset_name)
+    candidates = find_patches(asset_name, builds, published) if builds else []
+    if not candidates:
+        return None
+
+    errors = []
+    for tag, old_sha256, location, patch_sha256, extension in candidates:
+        out_path = store.incoming_path(download_url, asset_name) + ".patched"
+        patch_path = location
+        downloaded = location.startswith(("http://", "https://"))
+        try:
+            if downloaded:
+                patch_path = store.incoming_path(location, os.path.basename(location))
+                downloads.download(location, patch_path, progress, cancel=cancel, expected_sha256=patch_sha256)
+            FORMATS[extension][1](store.blob_path(old_sha256), patch_path, out_path)
+            digest = file_sha256(out_path)
+            if digest != sha256:
+                raise PatchError(f"patched build has SHA-256 {digest}, expected {sha256}")
+        except downloads.DownloadCancelled:
+            raise
+        except Exception as e:
+            errors.append(f"{os.path.basename(location)}: {e}")
+            if os.path.exists(out_path):
+                os.remove(out_path)
+            continue
+        finally:
+            if downloaded and os.path.exists(patch_path):
+                os.remove(patch_path)
+
+        store.add(out_path, digest, download_url)
+        return digest
+    raise PatchError("; ".join(errors))
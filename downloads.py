@@ -0,0 +1,399 @@
+import os
+import json
+import time
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+import http_client
+import tracing
+
+CHUNK_SIZE = 64 * 1024
+DEFAULT_CONNECTIONS = 4
+MIN_SEGMENT_SIZE = 1024 * 1024
+PART_SUFFIX = ".part"
+STATE_SUFFIX = ".part.json"
+STATE_SAVE_INTERVAL = 0.5
+# Byte ranges and content-length refer to the raw file, so never ask for gzip
+RAW_HEADERS = {"Accept-Encoding": "identity"}
+
+
+class DownloadCancelled(Exception):
+    pass
+
+
+class RangesNotSupported(Exception):
+    pass
+
+
+class ChecksumMismatch(Exception):
+    pass
+
+
+def parse_sha256(value):
+    # Accepts a bare hex digest or GitHub's "sha256:<hex>" asset digest format
+    if not value:
+        return None
+    value = value.strip().lower()
+    if value.startswith("sha256:"):
+        value = value[7:]
+    if len(value) != 64 or any(c not in "0123456789abcdef" for c in value):
+        return None
+    return value
+
+
+class RemoteFile:
+    def __init__(self, url, size=0, accepts_ranges=False, etag=None, last_modified=None):
+        self.url = url
+        self.size = size
+        self.accepts_ranges = accepts_ranges
+        self.etag = etag
+        self.last_modified = last_modified
+
+    def validator(self):
+        # Value for If-Range, so a changed file is sent whole instead of spliced
+        return self.etag or self.last_modified
+
+
+def probe(url):
+    # GitHub asset URLs redirect to a CDN, so the resolved URL is reused for
+    # every segment request.
+    try:
+        r = http_client.head(url, headers=RAW_HEADERS, allow_redirects=True)
+        r.raise_for_status()
+    except requests.RequestException:
+        return RemoteFile(url)
+
+    return RemoteFile(
+        r.url,
+        int(r.headers.get("content-length", 0)),
+        r.headers.get("accept-ranges", "").lower() == "bytes",
+        r.headers.get("etag"),
+        r.headers.get("last-modified"),
+    )
+
+
+def split_ranges(size, connections):
+    count = max(1, min(connections, size // MIN_SEGMENT_SIZE))
+    step = size // count
+    ranges = []
+    for i in range(count):
+        start = i * step
+        end = size - 1 if i == count - 1 else start + step - 1
+        ranges.append((start, end))
+    return ranges
+
+
+class DownloadState:
+    # Sidecar file next to the .part file describing what has been fetched so
+    # far, so an interrupted transfer can pick up where it left off.
+    def __init__(self, path):
+        self.path = path
+        self.data = {}
+        self.lock = threading.Lock()
+        self.last_save = 0
+
+    def load(self):
+        try:
+            with open(self.path, "r") as f:
+                self.data = json.load(f)
+        except (OSError, ValueError):
+            self.data = {}
+
+    def matches(self, url, remote):
+        if not self.data or self.data.get("url") != url:
+            return False
+        if self.data.get("size") != remote.size:
+            return False
+        return self.data.get("validator") == remote.validator()
+
+    def reset(self, url, remote, mode):
+        self.data = {
+            "url": url,
+            "size": remote.size,
+            "validator": remote.validator(),
+            "mode": mode,
+        }
+
+    def save(self, force=False):
+        with self.lock:
+            now = time.monotonic()
+            if not force and now - self.last_save < STATE_SAVE_INTERVAL:
+                return
+            self.last_save = now
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(self.data, f)
+            os.replace(tmp_path, self.path)
+
+    def remove(self):
+        for path in (self.path, self.path + ".tmp"):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+
+class StreamingHasher:
+    # Hashes bytes as they arrive when they extend the hashed prefix, and reads
+    # back whatever is left (other segments, resumed data) from disk at the end.
+    def __init__(self):
+        self.sha = hashlib.sha256()
+        self.position = 0
+        self.lock = threading.Lock()
+
+    def feed(self, offset, data):
+        with self.lock:
+            if offset == self.position:
+                self.sha.update(data)
+                self.position += len(data)
+
+    def catch_up(self, path, upto):
+        with self.lock:
+            if self.position >= upto:
+                return
+            with open(path, "rb") as f:
+                f.seek(self.position)
+                while self.position < upto:
+                    block = f.read(min(1024 * 1024, upto - self.position))
+                    if not block:
+                        break
+                    self.sha.update(block)
+                    self.position += len(block)
+
+    def hexdigest(self):
+        return self.sha.hexdigest()
+
+
+class PositionalWriter:
+    def __init__(self, path, size):
+        flags = os.O_RDWR | os.O_CREAT | getattr(os, "O_BINARY", 0)
+        self.fd = os.open(path, flags, 0o644)
+        self.lock = threading.Lock()
+        os.ftruncate(self.fd, size)
+        if size > 0 and hasattr(os, "posix_fallocate"):
+            try:
+                os.posix_fallocate(self.fd, 0, size)
+            except OSError:
+                pass # Filesystem doesn't support it, the sparse file still works
+
+    def write(self, offset, data):
+        view = memoryview(data)
+        if hasattr(os, "pwrite"):
+            while view:
+                written = os.pwrite(self.fd, view, offset)
+                offset += written
+                view = view[written:]
+        else:
+            # No pwrite on Windows, so serialize seek + write
+            with self.lock:
+                os.lseek(self.fd, offset, os.SEEK_SET)
+                while view:
+                    written = os.write(self.fd, view)
+                    view = view[written:]
+
+    def sync(self):
+        os.fsync(self.fd)
+
+    def close(self):
+        os.close(self.fd)
+
+
+class ProgressCounter:
+    def __init__(self, total, callback, done=0):
+        self.total = total
+        self.callback = callback
+        self.done = done
+        self.lock = threading.Lock()
+
+    def add(self, amount):
+        with self.lock:
+            self.done += amount
+            if self.callback:
+                self.callback(self.done, self.total)
+
+
+def _check_cancel(*events):
+    for event in events:
+        if event is not None and event.is_set():
+            raise DownloadCancelled()
+
+
+def _range_headers(start, end, remote):
+    headers = dict(RAW_HEADERS, Range=f"bytes={start}-{end}")
+    if remote.validator():
+        headers["If-Range"] = remote.validator()
+    return headers
+
+
+def _range_start(response):
+    # First byte of a 206 response, from "Content-Range: bytes 100-199/200"
+    unit, _, spec = response.headers.get("content-range", "").partition(" ")
+    start = spec.partition("-")[0]
+    return int(start) if unit == "bytes" and start.isdigit() else None
+
+
+def _fetch_range(remote, writer, segment, state, hasher, counter, cancel, stop):
+    start, end, offset = segment
+    headers = _range_headers(offset, end, remote)
+    with tracing.span("download.range", "http", start=offset, end=end):
+        with http_client.get(remote.url, headers=headers, stream=True) as r:
+            r.raise_for_status()
+            if r.status_code != 206 or _range_start(r) != offset:
+                raise RangesNotSupported()
+
+            for chunk in r.iter_content(chunk_size=CHUNK_SIZE):
+                _check_cancel(cancel, stop)
+                if chunk:
+                    writer.write(offset, chunk)
+                    hasher.feed(offset, chunk)
+                    offset += len(chunk)
+                    segment[2] = offset
+                    counter.add(len(chunk))
+                    state.save()
+
+    if offset != end + 1:
+        raise IOError(f"Incomplete range {start}-{end}: got {offset - start} bytes")
+
+
+def download_ranged(remote, part_path, state, hasher, progress=None, connections=DEFAULT_CONNECTIONS, cancel=None):
+    # Segments are stored as [start, end, next_offset] and updated in place
+    segments = state.data.get("segments")
+    if not segments:
+        segments = [[start, end, start] for start, end in split_ranges(remote.size, connections)]
+        state.data["segments"] = segments
+
+    done = sum(offset - start for start, end, offset in segments)
+    counter = ProgressCounter(remote.size, progress, done)
+    if os.path.exists(part_path):
+        hasher.catch_up(part_path, segments[0][2])
+
+    writer = PositionalWriter(part_path, remote.size)
+    stop = threading.Event()
+    try:
+        pending = [segment for segment in segments if segment[2] <= segment[1]]
+        with ThreadPoolExecutor(max_workers=connections) as pool:
+            futures = [
+                pool.submit(_fetch_range, remote, writer, segment, state, hasher, counter, cancel, stop)
+                for segment in pending
+            ]
+            try:
+                for future in futures:
+                    future.result()
+            except BaseException:
+                # Stop the remaining workers before re-raising
+                stop.set()
+                for future in futures:
+                    future.cancel()
+                raise
+        writer.sync()
+    finally:
+        writer.close()
+        state.save(force=True)
+
+
+def download_stream(url, remote, part_path, state, hasher, progress=None, cancel=None):
+    existing = 0
+    if state.data.get("mode") == "stream" and os.path.exists(part_path):
+        existing = os.path.getsize(part_path)
+
+    if existing and existing == remote.size:
+        # Complete, the last run was stopped before the rename
+        return
+
+    resume = existing and remote.accepts_ranges
+    r = http_client.get(url, headers=_range_headers(existing, "", remote) if resume else RAW_HEADERS, stream=True)
+    if resume and (r.status_code == 416 or (r.status_code == 206 and _range_start(r) != existing)):
+        # Nothing left past our offset, or another range than the one asked
+        # for, start over
+        r.close()
+        resume = False
+        r = http_client.get(url, headers=RAW_HEADERS, stream=True)
+
+    with r:
+        r.raise_for_status()
+        # Anything but the asked for range (a 200 with the whole body) is
+        # written from the start, over the partial data
+        if resume and r.status_code == 206:
+            hasher.catch_up(part_path, existing)
+            mode = "ab"
+        else:
+            existing = 0
+            mode = "wb"
+
+        total_size = int(r.headers.get("content-length", 0))
+        if total_size:
+            total_size += existing
+        counter = ProgressCounter(total_size, progress, existing)
+        state.save(force=True)
+
+        offset = existing
+        with open(part_path, mode) as f:
+            for chunk in r.iter_content(chunk_size=CHUNK_SIZE):
+                _check_cancel(cancel)
+                if chunk:
+                    f.write(chunk)
+                    hasher.feed(offset, chunk)
+                    offset += len(chunk)
+                    counter.add(len(chunk))
+            f.flush()
+            os.fsync(f.fileno())
+
+
+def _discard(part_path, state):
+    state.remove()
+    try:
+        os.remove(part_path)
+    except FileNotFoundError:
+        pass
+
+
+def download(url, file_path, progress=None, connections=DEFAULT_CONNECTIONS, cancel=None, expected_sha256=None):
+    # Downloads into <file_path>.part, verifies the SHA-256 and renames it into
+    # place. An interrupted download leaves the .part file and its state behind
+    # and is resumed on the next call for the same URL.
+    # progress is called as progress(downloaded_bytes, total_bytes), possibly
+    # from worker threads. Returns the hex SHA-256 of the file.
+    part_path = file_path + PART_SUFFIX
+    state = DownloadState(file_path + STATE_SUFFIX)
+    remote = probe(url)
+
+    ranged = remote.accepts_ranges and remote.size >= 2 * MIN_SEGMENT_SIZE and connections > 1
+    mode = "ranged" if ranged else "stream"
+
+    state.load()
+    # Ranged progress only holds while the preallocated .part file is still
+    # there at full size, otherwise the "done" segments would be left as zeros
+    lost_part = mode == "ranged" and state.data.get("segments") and (
+        not os.path.exists(part_path) or os.path.getsize(part_path) != remote.size)
+    if not state.matches(url, remote) or state.data.get("mode") != mode or lost_part:
+        _discard(part_path, state)
+        state.reset(url, remote, mode)
+
+    hasher = StreamingHasher()
+    if ranged:
+        try:
+            download_ranged(remote, part_path, state, hasher, progress, connections, cancel)
+        except RangesNotSupported:
+            # Server ignored the Range header or the file changed, start over
+            # with a single stream
+            _discard(part_path, state)
+            state.reset(url, remote, "stream")
+            hasher = StreamingHasher()
+            download_stream(url, remote, part_path, state, hasher, progress, cancel)
+    else:
+        download_stream(url, remote, part_path, state, hasher, progress, cancel)
+
+    hasher.catch_up(part_path, os.path.getsize(part_path))
+    digest = hasher.hexdigest()
+
+    expected = parse_sha256(expected_sha256)
+    if expected and digest != expected:
+        _discard(part_path, state)
+        raise ChecksumMismatch(f"SHA-256 mismatch for {os.path.basename(file_path)}: expected {expected}, got {digest}")
+
+    os.replace(part_path, file_path)
+    state.remove()
+    return digest
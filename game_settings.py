@@ -0,0 +1,209 @@
+import os
+import math
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+SETTINGS_FILE = os.path.join("data", "settings.txt")
+BULK_WORKERS = 8 # Instances written at once by bulk_apply
+
+
+class SettingsError(ValueError):
+    pass
+
+
+class Setting:
+    # One key of a game's settings.txt, with its type, default and range.
+    # Values are kept typed in memory and written the way the game writes
+    # them (booleans as True / False).
+    def __init__(self, key, label, kind, default, minimum=None, maximum=None):
+        self.key = key
+        self.label = label
+        self.kind = kind
+        self.default = default
+        self.minimum = minimum
+        self.maximum = maximum
+
+    def parse(self, value):
+        # Accepts the text form (from a file or the command line) or an
+        # already typed value, and raises SettingsError when it doesn't fit
+        if self.kind is bool:
+            if isinstance(value, bool):
+                return value
+            text = str(value).strip().lower()
+            if text in ("true", "1", "yes", "on"):
+                return True
+            if text in ("false", "0", "no", "off"):
+                return False
+            raise SettingsError(f"{self.key}: expected True or False, got '{value}'")
+
+        if self.kind is str:
+            value = str(value)
+            if "\n" in value:
+                raise SettingsError(f"{self.key}: must be a single line")
+            return value
+
+        try:
+            parsed = self.kind(value)
+        except (TypeError, ValueError):
+            raise SettingsError(f"{self.key}: expected {self.kind.__name__}, got '{value}'")
+        if self.kind is float and not math.isfinite(parsed):
+            raise SettingsError(f"{self.key}: expected a finite number, got '{value}'")
+        if self.minimum is not None and parsed < self.minimum:
+            raise SettingsError(f"{self.key}: {parsed} is below the minimum of {self.minimum}")
+        if self.maximum is not None and parsed > self.maximum:
+            raise SettingsError(f"{self.key}: {parsed} is above the maximum of {self.maximum}")
+        return parsed
+
+    def format(self, value):
+        return str(value)
+
+
+# In the order the game writes them
+SCHEMA = [
+    Setting("jumpVelocity", "Jump Velocity", int, 12, 1, 100),
+    Setting("scrollPixelsPerFrame", "Scroll Speed", int, 8, 1, 50),
+    Setting("maxFps", "Max FPS", int, 60, 30, 1000),
+    Setting("speed_increase", "Speed Increase", float, 0.03, 0.0, 99.99),
+    Setting("name", "Player Name", str, ""),
+    Setting("rememberName", "Remember Name", bool, False),
+]
+SETTINGS = {setting.key: setting for setting in SCHEMA}
+
+_path_locks = {}
+_path_locks_lock = threading.Lock()
+
+
+def settings_path(instance_dir):
+    return os.path.join(instance_dir, SETTINGS_FILE) if instance_dir else None
+
+
+def defaults():
+    return {setting.key: setting.default for setting in SCHEMA}
+
+
+def validate(changes):
+    # Returns the changes typed, or raises SettingsError for unknown keys and
+    # bad values
+    validated = {}
+    for key, value in changes.items():
+        setting = SETTINGS.get(key)
+        if setting is None:
+            raise SettingsError(f"Unknown setting '{key}' (known: {', '.join(SETTINGS)})")
+        validated[key] = setting.parse(value)
+    return validated
+
+
+def parse(text, partial=False):
+    # Known keys come back typed, values the game may have left broken fall
+    # back to the default. Keys the schema doesn't know are kept as text.
+    # With partial, only the keys present in text are returned (profiles).
+    settings = {} if partial else defaults()
+    for line in text.splitlines():
+        key, sep, value = line.strip().partition("=")
+        if not sep or not key:
+            continue
+        setting = SETTINGS.get(key)
+        if setting is None:
+            settings[key] = value
+            continue
+        try:
+            settings[key] = setting.parse(value)
+        except SettingsError:
+            if partial:
+                raise
+            settings[key] = setting.default
+    return settings
+
+
+def format_settings(settings):
+    return "".join(f"{key}={SETTINGS[key].format(value) if key in SETTINGS else value}\n"
+                   for key, value in settings.items())
+
+
+def read(path):
+    # A missing file reads as the defaults. Bytes that aren't UTF-8 are
+    # replaced, a known key holding them falls back to its default.
+    try:
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            return parse(f.read())
+    except FileNotFoundError:
+        return defaults()
+
+
+def load_profile(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return parse(f.read(), partial=True)
+
+
+def save_profile(path, settings):
+    write(path, settings)
+
+
+def path_lock(path):
+    with _path_locks_lock:
+        return _path_locks.setdefault(os.path.abspath(path), threading.Lock())
+
+
+def write(path, settings):
+    # Atomic, through a temporary file next to the target. Returns False
+    # without touching the file when it already has exactly this content.
+    text = format_settings(settings)
+    try:
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            if f.read() == text:
+                return False
+    except FileNotFoundError:
+        pass
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+    return True
+
+
+def apply(path, changes):
+    # Merges (already validated) changes into one settings file. Returns
+    # "updated", or "unchanged" when the file already has these values.
+    with path_lock(path):
+        current = read(path)
+        merged = dict(current)
+        merged.update(changes)
+        if merged == current and os.path.exists(path):
+            return "unchanged"
+        return "updated" if write(path, merged) else "unchanged"
+
+
+def bulk_apply(paths, changes, workers=BULK_WORKERS, progress=None, cancel=None):
+    # Applies the same changes (a whole profile or a few keys) to many
+    # settings files in parallel. Returns (path, status, error) per path, in
+    # order, status being "updated", "unchanged", "failed" or "cancelled".
+    changes = validate(changes)
+    done = [0]
+    done_lock = threading.Lock()
+
+    def apply_one(path):
+        if cancel is not None and cancel.is_set():
+            return path, "cancelled", None
+        try:
+            result = (path, apply(path, changes), None)
+        except (OSError, ValueError) as e:
+            result = (path, "failed", str(e))
+        if progress:
+            with done_lock:
+                done[0] += 1
+                progress(done[0], len(paths))
+        return result
+
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(paths)))) as executor:
+        return list(executor.map(apply_one, paths))
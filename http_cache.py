@@ -0,0 +1,100 @@
+import os
+import json
+import time
+import hashlib
+import threading
+
+import http_client
+
+DEFAULT_TTL = 300
+
+
+class HttpCache:
+    # On-disk cache of JSON API responses keyed by URL. Entries older than the
+    # TTL are revalidated with If-None-Match / If-Modified-Since, and a 304
+    # reply refreshes the entry without transferring the body again.
+    def __init__(self, directory, ttl=DEFAULT_TTL):
+        self.directory = directory
+        self.ttl = ttl
+
+    def entry_path(self, url):
+        key = hashlib.sha1(url.encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, key + ".json")
+
+    def load(self, url):
+        try:
+            with open(self.entry_path(url), "r") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return entry if entry.get("url") == url else None
+
+    def store(self, entry):
+        os.makedirs(self.directory, exist_ok=True)
+        path = self.entry_path(entry["url"])
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(entry, f)
+        os.replace(tmp_path, path)
+
+    def is_fresh(self, entry):
+        return time.time() - entry.get("fetched_at", 0) < self.ttl
+
+    def fetch(self, url, force=False):
+        entry = self.load(url)
+        if entry and not force and self.is_fresh(entry):
+            return entry
+
+        headers = {}
+        if entry:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+
+        response = http_client.get(url, headers=headers)
+        if response.status_code == 304 and entry:
+            entry["fetched_at"] = time.time()
+            self.store(entry)
+            return entry
+
+        response.raise_for_status()
+        entry = {
+            "url": url,
+            "etag": response.headers.get("etag"),
+            "last_modified": response.headers.get("last-modified"),
+            "fetched_at": time.time(),
+            "next": response.links.get("next", {}).get("url"),
+            "data": response.json(),
+        }
+        self.store(entry)
+        return entry
+
+    def get_json(self, url, force=False):
+        return self.fetch(url, force)["data"]
+
+    def get_all_pages(self, url, force=False):
+        # Follows Link: rel="next" and concatenates the pages
+        results = []
+        seen = set()
+        while url and url not in seen:
+            seen.add(url)
+            entry = self.fetch(url, force)
+            results.extend(entry["data"])
+            url = entry.get("next")
+        return results
+
+    def peek_all_pages(self, url):
+        # Cached pages only, no network. None when nothing is cached yet.
+        results = []
+        seen = set()
+        first = True
+        while url and url not in seen:
+            seen.add(url)
+            entry = self.load(url)
+            if entry is None:
+                return None if first else results
+            first = False
+            results.extend(entry["data"])
+            url = entry.get("next")
+        return results
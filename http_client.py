@@ -0,0 +1,76 @@
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+import tracing
+
+CONNECT_TIMEOUT = 10
+READ_TIMEOUT = 30
+POOL_HOSTS = 8 # Distinct hosts kept in the pool
+POOL_MAXSIZE = 8 # Connections kept alive per host, extra requests wait for one
+MAX_RETRIES = 3
+BACKOFF_FACTOR = 0.5
+USER_AGENT = "Skakavi-krompir-Launcher"
+
+_session = None
+_session_lock = threading.Lock()
+
+
+class TimeoutHTTPAdapter(HTTPAdapter):
+    # requests has no session-wide timeout, so apply one per request here
+    def __init__(self, *args, timeout=(CONNECT_TIMEOUT, READ_TIMEOUT), **kwargs):
+        self.timeout = timeout
+        super().__init__(*args, **kwargs)
+
+    def send(self, request, **kwargs):
+        if kwargs.get("timeout") is None:
+            kwargs["timeout"] = self.timeout
+        # Until the headers are in, streamed bodies are read afterwards
+        with tracing.span(f"http {request.method}", "http", url=request.url) as span:
+            response = super().send(request, **kwargs)
+            span.set(status=response.status_code)
+        return response
+
+
+def create_session():
+    retry = Retry(
+        total=MAX_RETRIES,
+        backoff_factor=BACKOFF_FACTOR,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=("GET", "HEAD"),
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    adapter = TimeoutHTTPAdapter(
+        pool_connections=POOL_HOSTS,
+        pool_maxsize=POOL_MAXSIZE,
+        pool_block=True,
+        max_retries=retry,
+    )
+
+    s = requests.Session()
+    s.mount("http://", adapter)
+    s.mount("https://", adapter)
+    s.headers.update({
+        "User-Agent": USER_AGENT,
+        "Accept-Encoding": "gzip, deflate",
+    })
+    return s
+
+
+def session():
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = create_session()
+        return _session
+
+
+def get(url, **kwargs):
+    return session().get(url, **kwargs)
+
+
+def head(url, **kwargs):
+    return session().head(url, **kwargs)
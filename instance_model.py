@@ -0,0 +1,207 @@
+import os
+from collections import OrderedDict
+
+from PySide6.QtCore import Qt, QObject, QAbstractListModel, QModelIndex, QSize, Signal
+from PySide6.QtGui import QIcon, QPixmap
+
+import tasks
+import tracing
+import thumbnails
+
+ICON_CACHE_SIZE = 512 # Decoded pixmaps kept in memory, across all sizes
+LIST_ICON_SIZE = thumbnails.THUMBNAIL_SIZES[0]
+DETAILS_ICON_SIZE = thumbnails.THUMBNAIL_SIZES[1]
+# Every cell has the same size, so the view (with uniformItemSizes) never has
+# to ask for the icons of rows it isn't showing
+ITEM_SIZE = QSize(120, 104)
+
+
+def file_stamp(path):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+def load_icon_image(task, path, size):
+    # Runs on the pool, so only QImage here (QPixmap is GUI thread only)
+    with tracing.span("icon.decode", path=path, size=size):
+        return thumbnails.load(path, size)
+
+
+class IconCache(QObject):
+    # LRU of decoded icons keyed by path, mtime, size and pixel size, so an
+    # icon file that changes on disk is simply a new entry. Misses are loaded
+    # on the task pool from the on-disk thumbnail cache (see thumbnails.py);
+    # get() returns None until then and loaded(path) is emitted once the
+    # pixmap is ready. Icon files are stat'ed once and the result kept in
+    # stamps until invalidate(path) or the load finishes, so painting rows
+    # doesn't touch the disk.
+    loaded = Signal(str)
+
+    def __init__(self, capacity=ICON_CACHE_SIZE, parent=None):
+        super().__init__(parent)
+        self.capacity = capacity
+        self.pixmaps = OrderedDict()
+        self.pending = set()
+        self.stamps = {} # path: (mtime_ns, size), or None when missing
+
+    def icon_key(self, path, size):
+        if path not in self.stamps:
+            self.stamps[path] = file_stamp(path)
+        stamp = self.stamps[path]
+        return (path, *stamp, size) if stamp is not None else None
+
+    def invalidate(self, path=None):
+        # Forgets the stat of one icon file, or all of them
+        if path is None:
+            self.stamps.clear()
+        else:
+            self.stamps.pop(path, None)
+
+    def get(self, path, size):
+        key = self.icon_key(path, size)
+        if key is None:
+            return None
+
+        pixmap = self.pixmaps.get(key)
+        if pixmap is not None:
+            self.pixmaps.move_to_end(key)
+            return None if pixmap.isNull() else pixmap
+
+        if key not in self.pending:
+            self.pending.add(key)
+            tasks.run_task(load_icon_image, path, size,
+                           on_finished=lambda image, key=key: self.on_loaded(key, image),
+                           on_error=lambda err, key=key: self.on_loaded(key, None))
+        return None
+
+    def prefetch(self, path):
+        self.invalidate(path)
+        for size in thumbnails.THUMBNAIL_SIZES:
+            self.get(path, size)
+
+    def on_loaded(self, key, image):
+        self.pending.discard(key)
+        # Restat on the next paint, in case the file changed while it loaded
+        self.invalidate(key[0])
+        # Failed decodes are cached too (as a null pixmap) so they aren't retried
+        self.pixmaps[key] = QPixmap.fromImage(image) if image is not None else QPixmap()
+        while len(self.pixmaps) > self.capacity:
+            self.pixmaps.popitem(last=False)
+        self.loaded.emit(key[0])
+
+
+class InstanceListModel(QAbstractListModel):
+    # The instance list, backed directly by InstanceManager.instances. Changes
+    # go through the methods below so views get row level updates instead of
+    # a full rebuild. Icons are only requested for rows the view paints.
+    def __init__(self, manager, icon_cache, key_fn, parent=None):
+        super().__init__(parent)
+        self.manager = manager
+        self.icon_cache = icon_cache
+        self.key_fn = key_fn
+        self.states = {}
+        self.rows_by_key = {}
+        self.rows_by_icon = {}
+        self.default_icon = QIcon.fromTheme("applications-games", QIcon("icon.png"))
+        self.icon_cache.loaded.connect(self.on_icon_loaded)
+        self.rebuild_index()
+
+    def rebuild_index(self):
+        self.rows_by_key = {}
+        self.rows_by_icon = {}
+        for row, inst in enumerate(self.manager.instances):
+            self.rows_by_key[self.key_fn(inst)] = row
+            icon_path = inst.get("icon_path")
+            if icon_path:
+                self.rows_by_icon.setdefault(icon_path, []).append(row)
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.manager.instances)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or index.row() >= len(self.manager.instances):
+            return None
+        inst = self.manager.instances[index.row()]
+
+        if role == Qt.ItemDataRole.DisplayRole:
+            state = self.states.get(self.key_fn(inst))
+            return f"{inst['name']}\n[{state}]" if state else inst["name"]
+        if role == Qt.ItemDataRole.DecorationRole:
+            return self.icon(inst.get("icon_path"), LIST_ICON_SIZE) or self.default_icon
+        if role == Qt.ItemDataRole.ToolTipRole:
+            return inst["path"]
+        if role == Qt.ItemDataRole.SizeHintRole:
+            return ITEM_SIZE
+        if role == Qt.ItemDataRole.TextAlignmentRole:
+            return Qt.AlignmentFlag.AlignCenter
+        if role == Qt.ItemDataRole.UserRole:
+            return inst
+        return None
+
+    def icon(self, icon_path, size):
+        if not icon_path:
+            return None
+        pixmap = self.icon_cache.get(icon_path, size)
+        return QIcon(pixmap) if pixmap is not None else None
+
+    def on_icon_loaded(self, icon_path):
+        for row in self.rows_by_icon.get(icon_path, ()):
+            index = self.index(row)
+            self.dataChanged.emit(index, index, [Qt.ItemDataRole.DecorationRole])
+
+    def row_for_key(self, key):
+        return self.rows_by_key.get(key)
+
+    def instance(self, row):
+        if row is None or not 0 <= row < len(self.manager.instances):
+            return None
+        return self.manager.instances[row]
+
+    def add_instance(self, name, path):
+        row = len(self.manager.instances)
+        self.beginInsertRows(QModelIndex(), row, row)
+        instance = self.manager.add_instance(name, path)
+        self.rebuild_index()
+        self.endInsertRows()
+        if instance is None:
+            self.resync() # Saving failed, nothing was added after all
+            return None
+        return row
+
+    def remove_instance(self, row):
+        if not 0 <= row < len(self.manager.instances):
+            return
+        self.beginRemoveRows(QModelIndex(), row, row)
+        removed = self.manager.remove_instance(row)
+        self.rebuild_index()
+        self.endRemoveRows()
+        if not removed:
+            self.resync()
+
+    def resync(self):
+        with tracing.span("instances.resync", rows=len(self.manager.instances)):
+            self.beginResetModel()
+            self.icon_cache.invalidate()
+            self.rebuild_index()
+            self.endResetModel()
+
+    def instance_changed(self, row):
+        icon_path = self.manager.instances[row].get("icon_path")
+        if icon_path:
+            self.icon_cache.invalidate(icon_path)
+        self.rebuild_index()
+        index = self.index(row)
+        self.dataChanged.emit(index, index)
+
+    def set_state(self, key, state):
+        if state:
+            self.states[key] = state
+        else:
+            self.states.pop(key, None)
+        row = self.rows_by_key.get(key)
+        if row is not None:
+            index = self.index(row)
+            self.dataChanged.emit(index, index, [Qt.ItemDataRole.DisplayRole])
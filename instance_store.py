@@ -0,0 +1,239 @@
+import os
+import json
+import uuid
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+import paths
+import tracing
+
+DB_NAME = "instances.db"
+LEGACY_FILE = "instances.json"
+CORE_FIELDS = ("id", "name", "path")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS instances (
+    id TEXT PRIMARY KEY,
+    position INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    path TEXT NOT NULL,
+    data TEXT NOT NULL DEFAULT '{}'
+);
+CREATE INDEX IF NOT EXISTS instances_name ON instances (name);
+CREATE INDEX IF NOT EXISTS instances_path ON instances (path);
+CREATE INDEX IF NOT EXISTS instances_position ON instances (position);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+def default_db_path():
+    return os.path.join(paths.app_dir(), DB_NAME)
+
+
+def new_id():
+    return uuid.uuid4().hex
+
+
+class InstanceStore:
+    # Instances in SQLite (WAL mode), one row each with a stable id. name and
+    # path are real, indexed columns; every other field (icon_path, ...) is
+    # kept as JSON in data. Every write is its own transaction unless it runs
+    # inside transaction(), which batches them into one commit.
+    def __init__(self, db_path=None, legacy_paths=None):
+        self.db_path = db_path or default_db_path()
+        os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+        self.conn = sqlite3.connect(self.db_path, timeout=10, isolation_level=None)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        self.lock = threading.RLock()
+        self.depth = 0
+
+        if legacy_paths is None:
+            legacy_paths = [os.path.join(paths.app_dir(), LEGACY_FILE), os.path.abspath(LEGACY_FILE)]
+        self.migrate(legacy_paths)
+
+    def close(self):
+        self.conn.close()
+
+    @contextmanager
+    def transaction(self):
+        with self.lock:
+            outer = self.depth == 0
+            if outer:
+                self.conn.execute("BEGIN IMMEDIATE")
+            self.depth += 1
+            try:
+                yield self
+            except BaseException:
+                self.depth -= 1
+                if outer:
+                    self.conn.execute("ROLLBACK")
+                raise
+            self.depth -= 1
+            if outer:
+                self.conn.execute("COMMIT")
+
+    def migrate(self, legacy_paths):
+        # One-time import of the old instances.json. The file is only renamed
+        # to .migrated once a later start finds the imported database again,
+        # so nothing is lost if the database was written somewhere that does
+        # not persist.
+        pending = self.conn.execute("SELECT value FROM meta WHERE key = 'legacy_pending'").fetchone()
+        if pending:
+            try:
+                os.replace(pending[0], pending[0] + ".migrated")
+            except OSError:
+                pass
+            self.conn.execute("DELETE FROM meta WHERE key = 'legacy_pending'")
+            return
+        if self.conn.execute("SELECT 1 FROM instances LIMIT 1").fetchone():
+            return
+        for legacy_path in dict.fromkeys(legacy_paths):
+            if not os.path.exists(legacy_path):
+                continue
+            try:
+                with open(legacy_path, "r") as f:
+                    instances = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"Error migrating {legacy_path}: {e}")
+                continue
+
+            with self.transaction():
+                for inst in instances:
+                    if isinstance(inst, dict) and inst.get("path"):
+                        self.add(inst.get("name") or os.path.basename(inst["path"]), inst["path"],
+                                 **{k: v for k, v in inst.items() if k not in CORE_FIELDS})
+                self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('legacy_pending', ?)",
+                                  (os.path.abspath(legacy_path),))
+            return
+
+    def row_to_instance(self, row):
+        instance = {"id": row["id"], "name": row["name"], "path": row["path"]}
+        instance.update(json.loads(row["data"]))
+        return instance
+
+    def all(self):
+        rows = self.conn.execute("SELECT * FROM instances ORDER BY position, rowid")
+        return [self.row_to_instance(row) for row in rows]
+
+    def get(self, instance_id):
+        row = self.conn.execute("SELECT * FROM instances WHERE id = ?", (instance_id,)).fetchone()
+        return self.row_to_instance(row) if row else None
+
+    def find_by_name(self, name):
+        rows = self.conn.execute("SELECT * FROM instances WHERE name = ? ORDER BY position", (name,))
+        return [self.row_to_instance(row) for row in rows]
+
+    def find_by_path(self, path):
+        rows = self.conn.execute("SELECT * FROM instances WHERE path = ? ORDER BY position", (path,))
+        return [self.row_to_instance(row) for row in rows]
+
+    def add(self, name, path, **fields):
+        instance = {"id": new_id(), "name": name, "path": path}
+        instance.update(fields)
+        with self.transaction():
+            position = self.conn.execute("SELECT COALESCE(MAX(position) + 1, 0) FROM instances").fetchone()[0]
+            self.conn.execute("INSERT INTO instances (id, position, name, path, data) VALUES (?, ?, ?, ?, ?)",
+                              (instance["id"], position, name, path, self.extra_json(instance)))
+        return instance
+
+    def update(self, instance):
+        self.update_many([instance])
+
+    def update_many(self, instances):
+        with self.transaction():
+            self.conn.executemany("UPDATE instances SET name = ?, path = ?, data = ? WHERE id = ?",
+                                  [(inst["name"], inst["path"], self.extra_json(inst), inst["id"]) for inst in instances])
+
+    def remove(self, instance_id):
+        with self.transaction():
+            self.conn.execute("DELETE FROM instances WHERE id = ?", (instance_id,))
+
+    def reorder(self, instance_ids):
+        with self.transaction():
+            self.conn.executemany("UPDATE instances SET position = ? WHERE id = ?",
+                                  [(position, instance_id) for position, instance_id in enumerate(instance_ids)])
+
+    def extra_json(self, instance):
+        return json.dumps({k: v for k, v in instance.items() if k not in CORE_FIELDS})
+
+
+class InstanceManager:
+    # In-memory list of instances in display order, persisted through
+    # InstanceStore. Rows are positions in this list, instances themselves are
+    # identified by their stable "id".
+    def __init__(self, store=None):
+        self.store = store or InstanceStore()
+        self.instances = self.load_instances()
+
+    def load_instances(self):
+        try:
+            with tracing.span("instances.load"):
+                return self.store.all()
+        except sqlite3.Error as e:
+            print(f"Error loading instances: {e}")
+        return []
+
+    def index_of(self, instance_id):
+        return next((i for i, inst in enumerate(self.instances) if inst["id"] == instance_id), None)
+
+    def get(self, instance_id):
+        index = self.index_of(instance_id)
+        return self.instances[index] if index is not None else None
+
+    def find_by_name(self, name):
+        return self.store.find_by_name(name)
+
+    def find_by_path(self, path):
+        return self.store.find_by_path(path)
+
+    def batch(self):
+        # Groups several changes into one transaction
+        return self.store.transaction()
+
+    def add_instance(self, name, path):
+        try:
+            instance = self.store.add(name, path)
+        except sqlite3.Error as e:
+            print(f"Error saving instances: {e}")
+            return None
+        self.instances.append(instance)
+        return instance
+
+    def update_instance(self, index, new_data):
+        if 0 <= index < len(self.instances):
+            new_data["id"] = self.instances[index]["id"]
+            try:
+                self.store.update(new_data)
+            except sqlite3.Error as e:
+                print(f"Error saving instances: {e}")
+                return
+            self.instances[index] = new_data
+
+    def update_instances(self, instances):
+        try:
+            self.store.update_many(instances)
+        except sqlite3.Error as e:
+            print(f"Error saving instances: {e}")
+            return
+        for inst in instances:
+            index = self.index_of(inst["id"])
+            if index is not None:
+                self.instances[index] = inst
+
+    def remove_instance(self, index):
+        if 0 <= index < len(self.instances):
+            try:
+                self.store.remove(self.instances[index]["id"])
+            except sqlite3.Error as e:
+                print(f"Error saving instances: {e}")
+                return False
+            del self.instances[index]
+            return True
+        return False
@@ -0,0 +1,156 @@
+import os
+import json
+import time
+
+# How long each launch of an instance took to get going, kept per instance in
+# data/launches.jsonl (one JSON object per launch, newest last). Phases are
+# milliseconds since the launch was requested:
+#   start          the process was spawned (later than the click when queued)
+#   process_start  the process is running
+#   first_output   first byte on stdout or stderr
+#   first_status   first status update from the game
+#   playing        first status with state "playing"
+
+HISTORY_FILE_NAME = "launches.jsonl"
+HISTORY_SIZE = 200 # Launches kept per instance
+PHASES = ("start", "process_start", "first_output", "first_status", "playing")
+PHASE_LABELS = {
+    "start": "Spawn",
+    "process_start": "Process start",
+    "first_output": "First output",
+    "first_status": "First status",
+    "playing": "Playing",
+}
+REGRESSION_THRESHOLD = 0.25 # Slower than the previous binary's median by this much is a regression
+REGRESSION_MIN_MS = 200 # ... and by at least this many ms, so fast starts don't alert on noise
+REGRESSION_BASELINE = 20 # Launches of the previous binary the baseline is taken from
+REGRESSION_WINDOW = 3 # Launches of a new binary that are checked against the baseline
+
+_summaries = {} # history path: (mtime, size, summary), for the details panel
+
+
+def history_path(data_dir):
+    return os.path.join(data_dir, HISTORY_FILE_NAME)
+
+
+def binary_id(path):
+    # Identifies the build an instance runs, so launches can be grouped by it.
+    # Builds are linked from the blob store, so size and mtime change with it.
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return f"{st.st_size}-{st.st_mtime_ns}"
+
+
+def load(data_dir):
+    entries = []
+    try:
+        with open(history_path(data_dir), "r") as f:
+            for line in f:
+                try:
+                    entries.append(json.loads(line))
+                except ValueError:
+                    continue # Torn last line of a launcher that was killed
+    except OSError:
+        pass
+    return entries
+
+
+def append(data_dir, entry):
+    # Appends one launch, rewriting the file once it grows past twice the size
+    # it is trimmed to
+    path = history_path(data_dir)
+    os.makedirs(data_dir, exist_ok=True)
+    with open(path, "a") as f:
+        f.write(json.dumps(entry) + "\n")
+
+    entries = load(data_dir)
+    if len(entries) > 2 * HISTORY_SIZE:
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w") as f:
+            f.writelines(json.dumps(e) + "\n" for e in entries[-HISTORY_SIZE:])
+        os.replace(tmp_path, path)
+
+
+def new_entry(phases, binary, settings, outcome):
+    return {
+        "time": time.time(),
+        "binary": binary,
+        "settings": settings,
+        "outcome": outcome,
+        "phases": {phase: round(phases[phase], 1) for phase in PHASES if phase in phases},
+    }
+
+
+def percentile(values, fraction):
+    # Nearest rank on the sorted values
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, round(fraction * (len(ordered) - 1))))]
+
+
+def summarize(entries):
+    # {phase: {"count", "p50", "p95"}} over the given launches
+    summary = {}
+    for phase in PHASES:
+        values = [entry["phases"][phase] for entry in entries if phase in entry.get("phases", {})]
+        if values:
+            summary[phase] = {"count": len(values), "p50": percentile(values, 0.5), "p95": percentile(values, 0.95)}
+    return summary
+
+
+def cached_summary(data_dir):
+    # summarize() of the whole history, reread only when the file changed
+    path = history_path(data_dir)
+    try:
+        st = os.stat(path)
+    except OSError:
+        return {}
+    cached = _summaries.get(path)
+    if cached and cached[:2] == (st.st_mtime_ns, st.st_size):
+        return cached[2]
+    summary = summarize(load(data_dir))
+    _summaries[path] = (st.st_mtime_ns, st.st_size, summary)
+    return summary
+
+
+def by_binary(entries):
+    # [(binary, launches)] oldest build first
+    groups = {}
+    for entry in entries:
+        groups.setdefault(entry.get("binary"), []).append(entry)
+    return sorted(groups.items(), key=lambda item: item[1][0].get("time", 0))
+
+
+def check_regression(entries, entry, threshold=REGRESSION_THRESHOLD):
+    # entries is the history before entry. Returns a message when entry runs
+    # a build that is new (within its first REGRESSION_WINDOW launches) and
+    # the build's median time to playing is past the threshold of the
+    # previous build's median.
+    value = entry["phases"].get("playing")
+    if value is None or entry.get("binary") is None:
+        return None
+    same = [e for e in entries if e.get("binary") == entry["binary"]]
+    if len(same) >= REGRESSION_WINDOW:
+        return None
+    previous = [e for e in entries if e.get("binary") != entry["binary"] and "playing" in e.get("phases", {})]
+    if not previous:
+        return None
+    previous_binary = previous[-1].get("binary")
+    baseline = [e["phases"]["playing"] for e in previous if e.get("binary") == previous_binary][-REGRESSION_BASELINE:]
+    current = [e["phases"]["playing"] for e in same if "playing" in e.get("phases", {})] + [value]
+
+    baseline_ms = percentile(baseline, 0.5)
+    current_ms = percentile(current, 0.5)
+    if current_ms > baseline_ms * (1 + threshold) and current_ms - baseline_ms >= REGRESSION_MIN_MS:
+        return (f"Startup regression: the new build takes {format_ms(current_ms)} to start playing, "
+                f"{(current_ms / baseline_ms - 1) * 100:.0f}% slower than the previous build ({format_ms(baseline_ms)})")
+    return None
+
+
+def format_ms(value):
+    return f"{value / 1000:.2f} s" if value >= 1000 else f"{value:.0f} ms"
+
+
+def format_phases(phases):
+    return ", ".join(f"{PHASE_LABELS[phase].lower()} {format_ms(phases[phase])}" for phase in PHASES if phase in phases)
@@ -0,0 +1,135 @@
+import os
+import sys
+
+import paths
+
+# Launcher logic shared by the GUI (main.py) and the command line (cli.py).
+# Nothing here imports Qt, and the HTTP stack only once it is needed.
+
+RELEASES_URL = "https://api.github.com/repos/Pavle012/Skakavi-krompir/releases"
+REPO_API_URL = "http://localhost:8000"
+RELEASES_CACHE_TTL = int(os.environ.get("SKAKAVI_RELEASES_TTL", 300)) # Seconds before cached release data is revalidated
+
+releases_cache = None
+
+
+def get_releases_cache():
+    global releases_cache
+    if releases_cache is None:
+        from http_cache import HttpCache
+        releases_cache = HttpCache(paths.cache_dir("http"), ttl=RELEASES_CACHE_TTL)
+    return releases_cache
+
+
+def releases_first_page_url():
+    return f"{RELEASES_URL}?per_page=100"
+
+
+def default_asset_name():
+    if sys.platform == "win32":
+        return "Skakavi-krompir-Windows.exe"
+    return "Skakavi-Krompir-Linux"
+
+
+def install_build(download_url, asset_name, version_tag, sha256=None, progress=None, cancel=None,
+                  release_assets=None):
+    # Downloads a game build into the blob store (or reuses the copy already
+    # there) and returns the instance name and path to link it as. With the
+    # release's assets, a patch from an installed older build is tried first.
+    import delta
+    import downloads
+    from blobstore import BlobStore
+    store = BlobStore()
+    file_path = store.link_path(version_tag, asset_name)
+    name = f"Skakavi Krompir {version_tag}"
+
+    # Already have this exact build, just link it
+    known_sha256 = downloads.parse_sha256(sha256) or store.lookup(download_url)
+    if store.has(known_sha256):
+        store.link(known_sha256, file_path)
+        if progress:
+            progress(1, 1)
+        return name, file_path
+
+    published = {asset["name"]: asset for asset in release_assets or []}
+    try:
+        patched = delta.update(store, download_url, asset_name, downloads.parse_sha256(sha256), published,
+                               progress, cancel)
+    except downloads.DownloadCancelled:
+        raise
+    except Exception as e:
+        print(f"Delta update of {asset_name} failed, downloading the full build: {e}", file=sys.stderr)
+        patched = None
+    if patched:
+        store.link(patched, file_path)
+        return name, file_path
+
+    incoming_path = store.incoming_path(download_url, asset_name)
+    digest = downloads.download(download_url, incoming_path, progress, cancel=cancel, expected_sha256=sha256)
+    store.add(incoming_path, digest, download_url)
+    store.link(digest, file_path)
+    return name, file_path
+
+
+def mod_download_url(version):
+    return f"{REPO_API_URL}/download/{version['id']}"
+
+
+def install_mod(version, target_dir, progress=None, cancel=None):
+    # Installs one version of a repository mod into target_dir, from the mod
+    # cache when any instance got it before
+    import mod_cache
+    return mod_cache.get_cache().install(mod_download_url(version), version["filename"], target_dir,
+                                         version.get("sha256") or version.get("hash"), progress, cancel)
+
+
+def prefetch_mod(version, progress=None, cancel=None):
+    # Fills the mod cache without installing, returns whether it was cached
+    import mod_cache
+    digest, cached = mod_cache.get_cache().fetch(mod_download_url(version), version["filename"],
+                                                 version.get("sha256") or version.get("hash"), progress, cancel)
+    return cached
+
+
+def game_command(instance_path, data_dir, extra_args=()):
+    # Python scripts are run with our interpreter, compiled builds directly
+    game_args = ["--data-dir", data_dir] + list(extra_args)
+    if instance_path.endswith(".py"):
+        return sys.executable, [instance_path] + game_args
+    return instance_path, game_args
+
+
+def instance_dir(instance):
+    return os.path.dirname(instance["path"]) if instance.get("path") else None
+
+
+def instance_data_dir(instance):
+    directory = instance_dir(instance)
+    return os.path.join(directory, "data") if directory else None
+
+
+def instance_mod_dir(instance):
+    directory = instance_dir(instance)
+    return os.path.join(directory, "mods") if directory else None
+
+
+def global_mod_dir():
+    if sys.platform == "win32":
+        return os.path.join(os.environ["APPDATA"], "SkakaviKrompir", "mods")
+    return os.path.join(os.path.expanduser("~"), ".local", "share", "SkakaviKrompir", "mods")
+
+
+def find_instance(instances, ref):
+    # Looks an instance up by id, unique id prefix or name
+    for inst in instances:
+        if inst["id"] == ref:
+            return inst
+    matches = [inst for inst in instances if inst["id"].startswith(ref)] if len(ref) >= 4 else []
+    if len(matches) == 1:
+        return matches[0]
+    matches = [inst for inst in instances if inst["name"] == ref]
+    if len(matches) == 1:
+        return matches[0]
+    if matches:
+        raise LookupError(f"'{ref}' matches {len(matches)} instances, use the id instead")
+    raise LookupError(f"No instance '{ref}'")
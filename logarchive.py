@@ -0,0 +1,235 @@
+import os
+import re
+import gzip
+import mmap
+import time
+import bisect
+import shutil
+import hashlib
+import threading
+
+import paths
+
+LOG_DIR_NAME = "logs"
+SEGMENT_SIZE = 32 * 1024 * 1024 # A session's log rolls over into a new file past this
+MAX_ARCHIVE_BYTES = 256 * 1024 * 1024 # Per instance, oldest archives are deleted first
+INDEX_CHUNK = 1024 * 1024 # Bytes between line index checkpoints
+MAX_CACHED_LOGS = 3 # Decompressed archives kept around for the viewer
+COPY_BUFFER = 1024 * 1024
+
+_archive_lock = threading.Lock()
+
+
+def log_dir(data_dir):
+    return os.path.join(data_dir, LOG_DIR_NAME)
+
+
+def list_logs(directory):
+    # Returns [(name, path, size)], newest first
+    logs = []
+    try:
+        with os.scandir(directory) as it:
+            for entry in it:
+                if entry.name.endswith((".log", ".log.gz")) and entry.is_file():
+                    logs.append((entry.name, entry.path, entry.stat().st_size))
+    except OSError:
+        return []
+    logs.sort(reverse=True)
+    return logs
+
+
+def compress_segment(path):
+    tmp_path = path + ".gz.tmp"
+    with open(path, "rb") as src, gzip.open(tmp_path, "wb", compresslevel=6) as dst:
+        shutil.copyfileobj(src, dst, COPY_BUFFER)
+    os.replace(tmp_path, path + ".gz")
+    os.remove(path)
+
+
+def prune(directory, max_bytes=MAX_ARCHIVE_BYTES):
+    # Only finished (compressed) segments are deleted, never a live one
+    archives = [log for log in list_logs(directory) if log[0].endswith(".gz")]
+    total = sum(size for name, path, size in archives)
+    for name, path, size in reversed(archives):
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+            total -= size
+        except OSError:
+            pass
+
+
+def archive_segment(path, max_bytes=MAX_ARCHIVE_BYTES):
+    with _archive_lock:
+        try:
+            compress_segment(path)
+        except OSError as e:
+            print(f"Error compressing {path}: {e}")
+        prune(os.path.dirname(path), max_bytes)
+
+
+class SessionLog:
+    # Appends one game session's raw output to data/logs/<start time>-<n>.log.
+    # Segments roll over at SEGMENT_SIZE; finished ones are gzipped on a
+    # background thread and the archive is pruned to MAX_ARCHIVE_BYTES.
+    def __init__(self, directory, segment_size=SEGMENT_SIZE, max_bytes=MAX_ARCHIVE_BYTES):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.segment_size = segment_size
+        self.max_bytes = max_bytes
+
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        self.session = stamp
+        suffix = 1
+        while any(name.startswith(self.session + "-") for name, path, size in list_logs(directory)):
+            suffix += 1
+            self.session = f"{stamp}.{suffix}"
+
+        self.segment = 0
+        self.file = None
+        self.path = None
+        self.size = 0
+        self.open_segment()
+
+    def open_segment(self):
+        self.segment += 1
+        self.path = os.path.join(self.directory, f"{self.session}-{self.segment:03d}.log")
+        self.file = open(self.path, "ab")
+        self.size = 0
+
+    def write(self, data):
+        if self.file is None:
+            return
+        try:
+            self.file.write(data)
+        except OSError as e:
+            # A full disk shouldn't take the game session down with it
+            print(f"Error writing {self.path}: {e}")
+            self.file.close()
+            self.file = None
+            return
+
+        self.size += len(data)
+        if self.size >= self.segment_size:
+            self.finish_segment()
+            self.open_segment()
+
+    def flush(self):
+        if self.file:
+            self.file.flush()
+
+    def finish_segment(self):
+        self.file.close()
+        self.file = None
+        threading.Thread(target=archive_segment, args=(self.path, self.max_bytes), daemon=True).start()
+
+    def close(self):
+        if self.file:
+            self.finish_segment()
+
+
+def cached_copy(path):
+    # Archives are decompressed once into the cache so they can be mapped
+    st = os.stat(path)
+    key = hashlib.sha1(f"{os.path.abspath(path)}:{st.st_size}:{st.st_mtime_ns}".encode("utf-8")).hexdigest()
+    directory = paths.cache_dir("logs")
+    cached = os.path.join(directory, key + ".log")
+    if os.path.exists(cached):
+        os.utime(cached)
+        return cached
+
+    os.makedirs(directory, exist_ok=True)
+    tmp_path = cached + ".tmp"
+    with gzip.open(path, "rb") as src, open(tmp_path, "wb") as dst:
+        shutil.copyfileobj(src, dst, COPY_BUFFER)
+    os.replace(tmp_path, cached)
+
+    old = sorted((entry.stat().st_mtime, entry.path) for entry in os.scandir(directory) if entry.name.endswith(".log"))
+    for mtime, old_path in old[:-MAX_CACHED_LOGS]:
+        try:
+            os.remove(old_path)
+        except OSError:
+            pass
+    return cached
+
+
+class LogIndex:
+    # Read-only, memory-mapped view of one log. Instead of an offset per line
+    # it keeps a checkpoint every INDEX_CHUNK bytes (how many lines start
+    # before it), so indexing a few hundred MB is a few hundred count() calls
+    # and any line is found by scanning at most one chunk.
+    def __init__(self, path, cancel=None):
+        self.source = path
+        self.path = cached_copy(path) if path.endswith(".gz") else path
+        self.file = open(self.path, "rb")
+        self.size = os.fstat(self.file.fileno()).st_size
+        self.mm = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ) if self.size else b""
+
+        self.checkpoints = [0] # Newlines before offset i * INDEX_CHUNK
+        newlines = 0
+        for start in range(0, self.size, INDEX_CHUNK):
+            if cancel and cancel.is_set():
+                self.close()
+                raise InterruptedError("Cancelled")
+            newlines += self.mm[start:start + INDEX_CHUNK].count(b"\n")
+            self.checkpoints.append(newlines)
+
+        self.line_count = newlines
+        if self.size and self.mm[self.size - 1:self.size] != b"\n":
+            self.line_count += 1 # Last line has no newline yet
+
+    def close(self):
+        if isinstance(self.mm, mmap.mmap):
+            try:
+                self.mm.close()
+            except BufferError:
+                pass # A search still holds it, it is released with the object
+        self.file.close()
+
+    def line_offset(self, line):
+        # Byte offset where line (0 based) starts
+        if line <= 0:
+            return 0
+        if line >= self.line_count:
+            return self.size
+        chunk = bisect.bisect_left(self.checkpoints, line) - 1
+        start = chunk * INDEX_CHUNK
+        data = self.mm[start:start + INDEX_CHUNK]
+        parts = data.split(b"\n", line - self.checkpoints[chunk])
+        return start + len(data) - len(parts[-1])
+
+    def line_at(self, offset):
+        chunk = offset // INDEX_CHUNK
+        start = chunk * INDEX_CHUNK
+        return self.checkpoints[chunk] + self.mm[start:offset].count(b"\n")
+
+    def lines(self, first, count):
+        start = self.line_offset(first)
+        end = self.line_offset(first + count)
+        text = self.mm[start:end].decode("utf-8", errors="replace")
+        if text.endswith("\n"):
+            text = text[:-1]
+        return text.split("\n") if text else []
+
+    def grep(self, pattern, limit=1000, ignore_case=True, cancel=None):
+        # Returns [(line, text)] for the first limit matching lines. The regex
+        # runs over the mapping directly, nothing is decoded until it matches.
+        flags = re.MULTILINE | (re.IGNORECASE if ignore_case else 0)
+        regex = re.compile(pattern.encode("utf-8"), flags)
+        results = []
+        pos = 0
+        while len(results) < limit and pos < self.size:
+            if cancel and cancel.is_set():
+                break
+            match = regex.search(self.mm, pos)
+            if not match:
+                break
+            line_start = self.mm.rfind(b"\n", 0, match.start()) + 1
+            line_end = self.mm.find(b"\n", match.start())
+            if line_end < 0:
+                line_end = self.size
+            text = self.mm[line_start:line_end].decode("utf-8", errors="replace").rstrip("\r")
+            results.append((self.line_at(line_start), text))
+            pos = line_end + 1
+        return results
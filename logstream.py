@@ -0,0 +1,74 @@
+import codecs
+from collections import deque
+
+MAX_PENDING_LINES = 10000 # Lines held between flushes, older ones are dropped first
+MAX_LINE_LENGTH = 4096 # Longer lines (or output without newlines) are cut
+
+
+class LogStream:
+    # Turns raw process output into lines for the log viewer. Each channel
+    # (stdout, stderr) gets its own incremental decoder, so multibyte
+    # characters split across reads come out whole. Complete lines collect in
+    # a bounded ring until take() is called; when output arrives faster than
+    # it is shown the oldest lines are dropped and counted instead of memory
+    # growing or the reader blocking.
+    def __init__(self, max_pending=MAX_PENDING_LINES):
+        self.pending = deque(maxlen=max_pending)
+        self.dropped = 0
+        self.decoders = {}
+        self.partial = {}
+
+    def feed(self, data, channel="stdout"):
+        decoder = self.decoders.get(channel)
+        if decoder is None:
+            decoder = self.decoders[channel] = codecs.getincrementaldecoder("utf-8")(errors="replace")
+
+        text = self.partial.get(channel, "") + decoder.decode(data)
+        lines = text.split("\n")
+        partial = lines.pop()
+        if len(partial) > MAX_LINE_LENGTH:
+            lines.append(partial)
+            partial = ""
+        self.partial[channel] = partial
+        self.extend(lines)
+
+    def append(self, text):
+        self.extend(text.rstrip("\n").split("\n"))
+
+    def extend(self, lines):
+        maxlen = self.pending.maxlen
+        overflow = len(self.pending) + len(lines) - maxlen
+        if overflow > 0:
+            self.dropped += overflow
+            if len(lines) > maxlen:
+                lines = lines[-maxlen:]
+        self.pending.extend(lines)
+
+    def close(self):
+        # Flushes whatever is left once the process has exited
+        for channel, decoder in self.decoders.items():
+            rest = self.partial.get(channel, "") + decoder.decode(b"", final=True)
+            if rest:
+                self.extend([rest])
+        self.decoders.clear()
+        self.partial.clear()
+
+    def has_pending(self):
+        return bool(self.pending or self.dropped)
+
+    def take(self, limit=None):
+        # Returns (lines, dropped). At most limit of the oldest lines are
+        # taken, the rest stay buffered for the next call.
+        pending = self.pending
+        if limit is not None and len(pending) > limit:
+            lines = [pending.popleft() for _ in range(limit)]
+        else:
+            lines = list(pending)
+            pending.clear()
+        dropped = self.dropped
+        self.dropped = 0
+        return [line[:MAX_LINE_LENGTH].rstrip("\r") for line in lines], dropped
+
+    def clear(self):
+        self.pending.clear()
+        self.dropped = 0
@@ -0,0 +1,257 @@
+import os
+import csv
+import json
+import time
+from array import array
+
+SAMPLE_INTERVAL = 1000 # ms between samples of every running game
+RING_SIZE = 3600 # Samples kept per session, an hour at the default interval
+METRICS_DIR_NAME = "metrics"
+FIELDS = ("time", "cpu", "rss", "read_bytes", "write_bytes")
+
+PROC = "/proc"
+CLK_TCK = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+_children_files = None # Whether the kernel has /proc/<pid>/task/<tid>/children
+
+
+def supported():
+    return os.path.exists(os.path.join(PROC, "self", "stat"))
+
+
+def metrics_dir(data_dir):
+    return os.path.join(data_dir, METRICS_DIR_NAME)
+
+
+class MetricsRing:
+    # Fixed size ring of samples, one array of doubles per field, so an
+    # hour of samples is a few hundred KB and appending never allocates.
+    # Once full the oldest samples are overwritten.
+    def __init__(self, capacity=RING_SIZE):
+        self.capacity = capacity
+        self.columns = {field: array("d", bytes(8 * capacity)) for field in FIELDS}
+        self.start = 0
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    def append(self, *values):
+        index = (self.start + self.count) % self.capacity
+        if self.count == self.capacity:
+            self.start = (self.start + 1) % self.capacity
+        else:
+            self.count += 1
+        for field, value in zip(FIELDS, values):
+            self.columns[field][index] = value
+
+    def column(self, field, last=None):
+        # Oldest first, only the newest `last` samples if given
+        count = self.count if last is None else min(last, self.count)
+        first = (self.start + self.count - count) % self.capacity
+        values = self.columns[field]
+        if first + count <= self.capacity:
+            return values[first:first + count].tolist()
+        return values[first:].tolist() + values[:first + count - self.capacity].tolist()
+
+    def latest(self):
+        if not self.count:
+            return None
+        index = (self.start + self.count - 1) % self.capacity
+        return {field: self.columns[field][index] for field in FIELDS}
+
+    def rows(self):
+        return zip(*(self.column(field) for field in FIELDS))
+
+
+def read_file(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def read_stat(pid):
+    # (ppid, session, cpu ticks, start time) from /proc/<pid>/stat. The
+    # command name may contain spaces and parentheses, so fields are counted
+    # from the last ")".
+    data = read_file(os.path.join(PROC, str(pid), "stat"))
+    fields = data[data.rindex(b")") + 2:].split()
+    return int(fields[1]), int(fields[3]), int(fields[11]) + int(fields[12]), int(fields[19])
+
+
+def read_io(pid):
+    read_bytes = write_bytes = 0
+    try:
+        for line in read_file(os.path.join(PROC, str(pid), "io")).splitlines():
+            if line.startswith(b"read_bytes:"):
+                read_bytes = int(line.split()[1])
+            elif line.startswith(b"write_bytes:"):
+                write_bytes = int(line.split()[1])
+    except (OSError, ValueError):
+        pass # Not readable for every process, e.g. setuid children
+    return read_bytes, write_bytes
+
+
+def read_process(pid):
+    # Returns (start time, cpu ticks, rss bytes, read bytes, write bytes), or
+    # None if the process is gone
+    try:
+        ppid, session, ticks, start_time = read_stat(pid)
+        rss = int(read_file(os.path.join(PROC, str(pid), "statm")).split()[1]) * PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        return None
+    return (start_time, ticks, rss) + read_io(pid)
+
+
+def process_table():
+    # (pid, ppid, session) of every process, for kernels without children files
+    table = []
+    for name in os.listdir(PROC):
+        if not name.isdigit():
+            continue
+        try:
+            ppid, session, ticks, start_time = read_stat(name)
+        except (OSError, ValueError, IndexError):
+            continue
+        table.append((int(name), ppid, session))
+    return table
+
+
+def children(pid):
+    global _children_files
+    pids = []
+    try:
+        for tid in os.listdir(os.path.join(PROC, str(pid), "task")):
+            pids += [int(child) for child in read_file(os.path.join(PROC, str(pid), "task", tid, "children")).split()]
+    except FileNotFoundError:
+        if _children_files is None and os.path.isdir(os.path.join(PROC, str(pid))):
+            _children_files = False
+        return pids
+    except OSError:
+        return pids
+    _children_files = True
+    return pids
+
+
+def process_tree(root, table=None):
+    # The root and all its descendants. Games run in their own session, so
+    # children that outlived their parent (and got reparented) are still
+    # found through the session id when the process table is used.
+    if table is None:
+        pids = [root]
+        i = 0
+        while i < len(pids):
+            pids += children(pids[i])
+            i += 1
+        return pids
+
+    by_parent = {}
+    for pid, ppid, session in table:
+        by_parent.setdefault(ppid, []).append(pid)
+    pids = {root}
+    stack = [root]
+    while stack:
+        for child in by_parent.get(stack.pop(), ()):
+            if child not in pids:
+                pids.add(child)
+                stack.append(child)
+    pids.update(pid for pid, ppid, session in table if session == root)
+    return sorted(pids)
+
+
+class ProcessSampler:
+    # Samples CPU, RSS and disk I/O of one game and its children into a
+    # MetricsRing. CPU and I/O are counted per process between samples, so
+    # children exiting don't make the totals go backwards.
+    def __init__(self, pid, capacity=RING_SIZE):
+        self.pid = pid
+        self.ring = MetricsRing(capacity)
+        self.started = time.monotonic()
+        self.last_time = self.started
+        self.last = {}
+        self.read_total = 0
+        self.write_total = 0
+        self.peak_rss = 0
+
+    def sample(self, table=None):
+        now = time.monotonic()
+        current = {}
+        for pid in process_tree(self.pid, table):
+            stats = read_process(pid)
+            if stats is not None:
+                current[pid] = stats
+        if not current:
+            return None
+
+        ticks = rss = 0
+        for pid, (start_time, cpu_ticks, rss_bytes, read_bytes, write_bytes) in current.items():
+            previous = self.last.get(pid)
+            if previous is None or previous[0] != start_time:
+                previous = (start_time, 0, 0, 0, 0) # New process (or a reused pid)
+            ticks += cpu_ticks - previous[1]
+            self.read_total += read_bytes - previous[3]
+            self.write_total += write_bytes - previous[4]
+            rss += rss_bytes
+        self.last = current
+
+        elapsed = max(now - self.last_time, 1e-6)
+        self.last_time = now
+        cpu = ticks / CLK_TCK / elapsed * 100
+        self.peak_rss = max(self.peak_rss, rss)
+        self.ring.append(now - self.started, cpu, rss, self.read_total, self.write_total)
+        return self.ring.latest()
+
+
+def sample_all(samplers):
+    # One pass over every running game, the process table (when needed) is
+    # read once for all of them
+    table = None
+    if _children_files is False:
+        table = process_table()
+    return [sampler.sample(table) for sampler in samplers]
+
+
+def summary(ring):
+    cpu = ring.column("cpu")
+    rss = ring.column("rss")
+    latest = ring.latest() or {}
+    return {
+        "samples": len(ring),
+        "duration": latest.get("time", 0),
+        "cpu_avg": sum(cpu) / len(cpu) if cpu else 0,
+        "cpu_max": max(cpu, default=0),
+        "rss_max": max(rss, default=0),
+        "read_bytes": latest.get("read_bytes", 0),
+        "write_bytes": latest.get("write_bytes", 0),
+    }
+
+
+def export(ring, directory, name, info=None):
+    # Writes <name>.csv (one row per sample) and <name>.json (summary plus
+    # the samples by column). Returns both paths.
+    os.makedirs(directory, exist_ok=True)
+    csv_path = os.path.join(directory, name + ".csv")
+    json_path = os.path.join(directory, name + ".json")
+
+    with open(csv_path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["time_s", "cpu_percent", "rss_bytes", "read_bytes", "write_bytes"])
+        for t, cpu, rss, read_bytes, write_bytes in ring.rows():
+            writer.writerow([f"{t:.3f}", f"{cpu:.1f}", int(rss), int(read_bytes), int(write_bytes)])
+
+    data = {
+        "info": info or {},
+        "interval_ms": SAMPLE_INTERVAL,
+        "summary": summary(ring),
+        "samples": {field: ring.column(field) for field in FIELDS},
+    }
+    with open(json_path, "w") as f:
+        json.dump(data, f)
+    return csv_path, json_path
+
+
+def format_bytes(value):
+    for unit in ("B", "KiB", "MiB", "GiB"):
+        if value < 1024 or unit == "GiB":
+            return f"{value:.0f} {unit}" if unit == "B" else f"{value:.1f} {unit}"
+        value /= 1024
@@ -0,0 +1,178 @@
+import os
+import json
+import time
+import shutil
+import hashlib
+import threading
+from contextlib import contextmanager
+
+import paths
+
+MOD_CACHE_SIZE = int(os.environ.get("SKAKAVI_MOD_CACHE_MB", "512")) * 1024 * 1024 # Bytes kept before evicting
+INDEX_NAME = "index.json"
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+class ModCache:
+    # Mod files downloaded from the repository, under cache/mods, one file per
+    # SHA-256. index.json maps download URLs (repository and version id) to
+    # hashes and records each artifact's size, mtime and last use. Installs
+    # copy from here, so a version is fetched once however many instances get
+    # it. Once over max_size, the least recently used artifacts are evicted.
+    def __init__(self, root=None, max_size=MOD_CACHE_SIZE):
+        self.root = root or paths.cache_dir("mods")
+        self.max_size = max_size
+        self.index_path = os.path.join(self.root, INDEX_NAME)
+        self.lock = threading.Lock() # index.json and the artifact files
+        self.url_locks = {} # url: [lock, holders]
+
+    def artifact_path(self, sha256):
+        return os.path.join(self.root, "artifacts", sha256[:2], sha256)
+
+    def incoming_path(self, url, filename):
+        key = hashlib.sha1(url.encode("utf-8")).hexdigest()[:16]
+        directory = os.path.join(self.root, "incoming")
+        os.makedirs(directory, exist_ok=True)
+        return os.path.join(directory, f"{key}-{filename}")
+
+    def load_index(self):
+        try:
+            with open(self.index_path, "r") as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            index = {}
+        index.setdefault("urls", {})
+        index.setdefault("artifacts", {})
+        return index
+
+    def save_index(self, index):
+        os.makedirs(self.root, exist_ok=True)
+        tmp_path = f"{self.index_path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(index, f)
+        os.replace(tmp_path, self.index_path)
+
+    @contextmanager
+    def url_lock(self, url):
+        # Installs of the same version wait for the first one's download. The
+        # lock is dropped by the last holder, so url_locks doesn't keep one
+        # for every URL ever fetched.
+        with self.lock:
+            entry = self.url_locks.setdefault(url, [threading.Lock(), 0])
+            entry[1] += 1
+        try:
+            with entry[0]:
+                yield
+        finally:
+            with self.lock:
+                entry[1] -= 1
+                if not entry[1]:
+                    del self.url_locks[url]
+
+    def is_intact(self, sha256, entry):
+        # Size and mtime catch a file changed behind our back without
+        # rehashing it
+        try:
+            st = os.stat(self.artifact_path(sha256))
+        except OSError:
+            return False
+        return st.st_size == entry.get("size") and st.st_mtime_ns == entry.get("mtime_ns")
+
+    def lookup(self, url, sha256=None):
+        # The cached artifact's hash for url, or None. Marks it as used.
+        with self.lock:
+            index = self.load_index()
+            cached = index["urls"].get(url)
+            if cached is None or (sha256 and cached != sha256):
+                return None
+            entry = index["artifacts"].get(cached)
+            if entry is None or not self.is_intact(cached, entry):
+                self.forget(index, cached)
+                self.save_index(index)
+                return None
+            entry["last_used"] = time.time()
+            self.save_index(index)
+            return cached
+
+    def forget(self, index, sha256):
+        index["artifacts"].pop(sha256, None)
+        index["urls"] = {url: cached for url, cached in index["urls"].items() if cached != sha256}
+        try:
+            os.remove(self.artifact_path(sha256))
+        except OSError:
+            pass
+
+    def add(self, file_path, sha256, url):
+        # Moves a verified download into the cache, then evicts
+        with self.lock:
+            index = self.load_index()
+            artifact_path = self.artifact_path(sha256)
+            os.makedirs(os.path.dirname(artifact_path), exist_ok=True)
+            os.replace(file_path, artifact_path)
+            st = os.stat(artifact_path)
+            index["artifacts"][sha256] = {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "last_used": time.time()}
+            index["urls"][url] = sha256
+            self.evict(index, keep=sha256)
+            self.save_index(index)
+
+    def evict(self, index, keep=None):
+        artifacts = index["artifacts"]
+        total = sum(entry["size"] for entry in artifacts.values())
+        for sha256, entry in sorted(artifacts.items(), key=lambda item: item[1].get("last_used", 0)):
+            if total <= self.max_size:
+                break
+            if sha256 == keep:
+                continue
+            self.forget(index, sha256)
+            total -= entry["size"]
+
+    def usage(self):
+        # (artifacts, bytes)
+        artifacts = self.load_index()["artifacts"]
+        return len(artifacts), sum(entry["size"] for entry in artifacts.values())
+
+    def fetch(self, url, filename, sha256=None, progress=None, cancel=None):
+        # Makes sure url is cached. Returns (sha256, whether it already was).
+        import downloads
+        with self.url_lock(url):
+            cached = self.lookup(url, downloads.parse_sha256(sha256))
+            if cached:
+                if progress:
+                    progress(1, 1)
+                return cached, True
+            incoming_path = self.incoming_path(url, filename)
+            digest = downloads.download(url, incoming_path, progress, connections=1, cancel=cancel,
+                                        expected_sha256=sha256)
+            self.add(incoming_path, digest, url)
+            return digest, False
+
+    def install(self, url, filename, target_dir, sha256=None, progress=None, cancel=None):
+        # Puts the artifact for url into target_dir/filename. Returns its hash.
+        target_path = os.path.join(target_dir, filename)
+        os.makedirs(target_dir, exist_ok=True)
+        for attempt in range(2):
+            digest, cached = self.fetch(url, filename, sha256, progress, cancel)
+            with self.lock:
+                # Evicted by a concurrent install in between, fetch it again
+                if os.path.exists(self.artifact_path(digest)):
+                    place(self.artifact_path(digest), target_path)
+                    return digest
+        raise OSError(f"{filename} was evicted from the mod cache while installing")
+
+
+def place(source_path, target_path):
+    # A copy rather than a hardlink: mods are small, and a mod edited in one
+    # instance must not change it in every other instance and the cache
+    tmp_path = f"{target_path}.{threading.get_ident()}.tmp"
+    shutil.copyfile(source_path, tmp_path)
+    os.replace(tmp_path, target_path)
+
+
+def get_cache():
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ModCache()
+        return _cache
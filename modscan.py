@@ -0,0 +1,97 @@
+import os
+import time
+import threading
+
+import tracing
+
+MOD_EXTENSIONS = (".py", ".skmod")
+DISABLED_SUFFIX = ".disabled"
+# Directory mtimes this recent may not reflect changes made within the same
+# timestamp tick (coarse on network filesystems), so don't trust the cache yet
+RACY_WINDOW = 2.0
+
+
+class ModEntry:
+    __slots__ = ("filename", "name", "enabled", "inode")
+
+    def __init__(self, filename, name, enabled, inode):
+        self.filename = filename
+        self.name = name
+        self.enabled = enabled
+        self.inode = inode
+
+
+def parse_mod_filename(filename):
+    # Returns (name, enabled), or None for files that aren't mods
+    name = filename
+    enabled = True
+    if filename.endswith(DISABLED_SUFFIX):
+        name = filename[:-len(DISABLED_SUFFIX)]
+        enabled = False
+    if name.endswith(MOD_EXTENSIONS):
+        return name, enabled
+    return None
+
+
+class ModScanner:
+    # scandir-based listing of mod directories, cached per directory and
+    # reused until the directory's mtime moves.
+    def __init__(self):
+        self.cache = {}
+        self.lock = threading.Lock()
+
+    def scan(self, directory, force=False):
+        # Returns {filename: ModEntry}
+        try:
+            mtime = os.stat(directory).st_mtime_ns
+        except OSError:
+            with self.lock:
+                self.cache.pop(directory, None)
+            return {}
+
+        with self.lock:
+            cached = self.cache.get(directory)
+        if cached and not force and cached[0] == mtime:
+            return cached[1]
+
+        entries = {}
+        with tracing.span("modscan.scan", directory=directory), os.scandir(directory) as it:
+            for entry in it:
+                parsed = parse_mod_filename(entry.name)
+                if parsed and entry.is_file():
+                    entries[entry.name] = ModEntry(entry.name, parsed[0], parsed[1], entry.inode())
+
+        if time.time() - mtime / 1e9 > RACY_WINDOW:
+            with self.lock:
+                self.cache[directory] = (mtime, entries)
+        return entries
+
+    def invalidate(self, directory):
+        with self.lock:
+            self.cache.pop(directory, None)
+
+
+def diff(current, scanned):
+    # current: {filename: inode or None} for what is shown, scanned: the result
+    # of ModScanner.scan. Returns (added, removed, renamed) where renamed is a
+    # list of (old_filename, ModEntry) matched by inode.
+    removed = [filename for filename in current if filename not in scanned]
+    added = [entry for filename, entry in scanned.items() if filename not in current]
+
+    renamed = []
+    if removed and added:
+        by_inode = {current[filename]: filename for filename in removed if current[filename]}
+        still_added = []
+        for entry in added:
+            old_filename = by_inode.pop(entry.inode, None) if entry.inode else None
+            if old_filename:
+                renamed.append((old_filename, entry))
+                removed.remove(old_filename)
+            else:
+                still_added.append(entry)
+        added = still_added
+
+    return added, removed, renamed
+
+
+scanner = ModScanner()
@@ -0,0 +1,18 @@
+import os
+import sys
+
+
+def app_dir():
+    # Next to the executable in Nuitka and PyInstaller builds: a onefile build
+    # runs from a temp dir that is deleted on exit
+    if "__compiled__" in globals() or getattr(sys, "frozen", False):
+        return os.path.dirname(os.path.abspath(sys.argv[0]))
+    return os.path.dirname(os.path.abspath(__file__))
+
+
+def bin_dir():
+    return os.path.join(app_dir(), "bin")
+
+
+def cache_dir(*parts):
+    return os.path.join(app_dir(), "cache", *parts)
@@ -0,0 +1,45 @@
+import os
+import sys
+import time
+
+START = time.perf_counter()
+
+from PySide6.QtCore import QCoreApplication, QObject, QEvent, QTimer
+
+import tracing
+
+TIMING_ARG = "--startup-timing"
+QUIT_ARG = "--quit-after-startup"
+
+
+class StartupTimer(QObject):
+    # Records named marks relative to when this module was first imported
+    # (which main.py does before anything heavy) and reports them once the
+    # watched widget first paints. --quit-after-startup exits right after,
+    # for measuring cold starts of a build in CI.
+    def __init__(self, argv=None):
+        super().__init__()
+        argv = sys.argv if argv is None else argv
+        self.enabled = TIMING_ARG in argv or QUIT_ARG in argv or bool(os.environ.get("SKAKAVI_STARTUP_TIMING"))
+        self.quit_after = QUIT_ARG in argv
+        self.marks = []
+
+    def mark(self, name):
+        self.marks.append((name, (time.perf_counter() - START) * 1000))
+        tracing.instant(name, "startup")
+
+    def report(self):
+        return "Startup: " + ", ".join(f"{name} {ms:.1f} ms" for name, ms in self.marks)
+
+    def watch_first_paint(self, widget):
+        widget.installEventFilter(self)
+
+    def eventFilter(self, obj, event):
+        if event.type() == QEvent.Type.Paint:
+            obj.removeEventFilter(self)
+            self.mark("first paint")
+            if self.enabled:
+                print(self.report(), file=sys.stderr, flush=True)
+            if self.quit_after:
+                QTimer.singleShot(0, QCoreApplication.quit)
+        return False
@@ -0,0 +1,132 @@
+import os
+import json
+import time
+import uuid
+
+from PySide6.QtCore import QObject, Signal, QTimer, QFileSystemWatcher
+from PySide6.QtNetwork import QLocalServer
+
+import tracing
+
+STATUS_SOCKET_ARG = "--status-socket"
+STATUS_TIMEOUT = 5 # Seconds without an update before the game counts as gone
+
+
+class StatusChannel(QObject):
+    # Receives game status pushed over a local socket as newline-delimited
+    # JSON objects ({"state": ..., "score": ..., "timestamp": ...}). Games
+    # that don't connect are followed through change notifications on
+    # data/status.json instead of polling it.
+    status_changed = Signal(dict)
+    timed_out = Signal()
+
+    def __init__(self, data_dir, parent=None):
+        super().__init__(parent)
+        self.status_file = os.path.join(data_dir, "status.json")
+        self.sockets = {}
+        self.last_file_mtime = None
+
+        self.server = QLocalServer(self)
+        self.server.setSocketOptions(QLocalServer.SocketOption.UserAccessOption)
+        self.server.newConnection.connect(self.on_new_connection)
+        self.server.listen(f"skakavi-status-{os.getpid()}-{uuid.uuid4().hex[:8]}")
+
+        # status.json is usually replaced rather than rewritten, which drops a
+        # file watch, so the directory is watched as well
+        self.watcher = QFileSystemWatcher(self)
+        self.watcher.directoryChanged.connect(self.read_status_file)
+        self.watcher.fileChanged.connect(self.read_status_file)
+        self.watcher.addPath(data_dir)
+        self.watch_status_file()
+
+        self.timeout_timer = QTimer(self)
+        self.timeout_timer.setSingleShot(True)
+        self.timeout_timer.setInterval(STATUS_TIMEOUT * 1000)
+        self.timeout_timer.timeout.connect(self.timed_out)
+
+    def address(self):
+        return self.server.fullServerName() if self.server.isListening() else None
+
+    def launch_args(self):
+        address = self.address()
+        return [STATUS_SOCKET_ARG, address] if address else []
+
+    def close(self):
+        self.timeout_timer.stop()
+        self.watcher.removePaths(self.watcher.files() + self.watcher.directories())
+        for sock in list(self.sockets):
+            sock.abort()
+        self.sockets.clear()
+        self.server.close()
+
+    def watch_status_file(self):
+        if os.path.exists(self.status_file) and self.status_file not in self.watcher.files():
+            self.watcher.addPath(self.status_file)
+
+    def read_status_file(self, path=None):
+        if self.sockets:
+            return # The socket is authoritative once the game has connected
+
+        self.watch_status_file()
+        try:
+            with tracing.span("status.read_file", path=self.status_file):
+                mtime = os.stat(self.status_file).st_mtime_ns
+                if mtime == self.last_file_mtime:
+                    return
+                with open(self.status_file, "r") as f:
+                    data = json.load(f)
+            self.last_file_mtime = mtime
+        except (OSError, ValueError):
+            return # Missing or half written, the next change notification retries
+
+        self.handle_status(data)
+
+    def on_new_connection(self):
+        while self.server.hasPendingConnections():
+            sock = self.server.nextPendingConnection()
+            self.sockets[sock] = b""
+            sock.readyRead.connect(lambda sock=sock: self.on_ready_read(sock))
+            sock.disconnected.connect(lambda sock=sock: self.on_disconnected(sock))
+
+        # No need to hear about status.json anymore
+        if self.watcher.files():
+            self.watcher.removePaths(self.watcher.files())
+
+    def on_ready_read(self, sock):
+        buffer = self.sockets.get(sock, b"") + sock.readAll().data()
+        *lines, rest = buffer.split(b"\n")
+        self.sockets[sock] = rest
+
+        # Events are handled in order so no state transition is missed, but
+        # a run of events in the same state only needs its newest one
+        events = []
+        for line in lines:
+            try:
+                data = json.loads(line)
+            except ValueError:
+                continue
+            if not isinstance(data, dict):
+                continue
+            if events and events[-1].get("state") == data.get("state"):
+                events[-1] = data
+            else:
+                events.append(data)
+        for data in events:
+            self.handle_status(data)
+
+    def on_disconnected(self, sock):
+        self.sockets.pop(sock, None)
+        sock.deleteLater()
+        self.watch_status_file()
+
+    def handle_status(self, data):
+        # Check if timestamp is too old (game crashed/closed without updating)
+        timestamp = data.get("timestamp", time.time())
+        if time.time() - timestamp > STATUS_TIMEOUT:
+            self.timeout_timer.stop()
+            self.timed_out.emit()
+            return
+
+        tracing.instant("status", state=data.get("state"))
+        self.status_changed.emit(data)
+        self.timeout_timer.start()
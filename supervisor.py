@@ -0,0 +1,332 @@
+import os
+import time
+import signal
+from collections import deque
+
+from PySide6.QtCore import QObject, QProcess, QTimer, Signal
+
+import metrics
+import tracing
+import game_settings
+import launch_history
+
+from launcher import game_command
+from logarchive import SessionLog, log_dir
+from status_channel import StatusChannel
+
+DEFAULT_MAX_CONCURRENT = 4
+
+
+def status_text(data):
+    state = data.get("state", "unknown")
+    score = data.get("score", 0)
+
+    if state == "playing":
+        return f"Playing - Score: {score}"
+    elif state == "paused":
+        return f"Paused - Score: {score}"
+    elif state == "game_over":
+        return f"Game Over - Final Score: {score}"
+    elif state == "stopped":
+        return "Finished"
+    return f"Status: {state}"
+
+
+class GameSession(QObject):
+    # One running game: its process, status channel and output
+    started = Signal(object)
+    status_changed = Signal(object, str)
+    output = Signal(object, str, bytes) # (session, channel, data)
+    finished = Signal(object, str)
+    launch_recorded = Signal(object, object, object) # (session, history entry, regression alert or None)
+
+    def __init__(self, key, instance, parent=None):
+        super().__init__(parent)
+        self.key = key
+        self.instance = instance
+        self.name = instance["name"]
+        self.state_text = "Queued"
+        self.status_channel = None
+        self.log = None
+        self.data_dir = None
+        self.session_name = None
+        self.sampler = None
+        self.metrics_paths = None
+        # ms from the launch request to each launch_history phase
+        self.requested = time.monotonic()
+        self.phases = {}
+        self.launch_saved = False
+
+        self.process = QProcess(self)
+        if hasattr(self.process, "setUnixProcessParameters"):
+            # Own process group, so killing it takes the game's children along
+            # without touching the launcher
+            self.process.setUnixProcessParameters(QProcess.UnixProcessFlag.CreateNewSession)
+        self.process.started.connect(self.on_started)
+        self.process.finished.connect(self.on_finished)
+        self.process.errorOccurred.connect(self.on_error)
+        self.process.readyReadStandardOutput.connect(self.read_stdout)
+        self.process.readyReadStandardError.connect(self.read_stderr)
+
+    def start(self):
+        with tracing.span("GameSession.start", instance=self.name):
+            self.start_process()
+
+    def start_process(self):
+        self.mark_phase("start")
+        instance_path = self.instance["path"]
+        working_dir = os.path.dirname(instance_path)
+
+        # Data directory for this instance
+        data_dir = os.path.join(working_dir, "data")
+        try:
+            os.makedirs(data_dir, exist_ok=True)
+        except OSError as e:
+            # Ends like a process that failed to start, so the supervisor
+            # frees the slot and the launch can be retried
+            print(f"Error creating {data_dir}: {e}")
+            self.state_text = f"Error: Cannot create {data_dir}"
+            self.finished.emit(self, self.state_text)
+            return
+        self.process.setWorkingDirectory(working_dir)
+        self.data_dir = data_dir
+
+        try:
+            self.log = SessionLog(log_dir(data_dir))
+        except OSError as e:
+            print(f"Error creating session log: {e}")
+        # Metrics are saved under the same name as the session's log
+        self.session_name = self.log.session if self.log else time.strftime("%Y%m%d-%H%M%S")
+
+        self.status_channel = StatusChannel(data_dir, self)
+        self.status_channel.status_changed.connect(self.on_status)
+        self.status_channel.timed_out.connect(lambda: self.set_state("Status: Not Running (Timeout)"))
+
+        program, args = game_command(instance_path, data_dir, self.status_channel.launch_args())
+        self.set_state("Launching...")
+        self.process.start(program, args)
+
+    def is_running(self):
+        return self.process.state() != QProcess.ProcessState.NotRunning
+
+    def kill(self):
+        if not self.is_running():
+            return
+        pid = self.process.processId()
+        try:
+            pgid = os.getpgid(pid)
+            if pgid == os.getpgrp():
+                raise PermissionError() # Shares our group, only kill the process
+            os.killpg(pgid, signal.SIGKILL)
+        except (AttributeError, ProcessLookupError, PermissionError):
+            self.process.kill()
+
+    def mark_phase(self, phase):
+        if phase not in self.phases:
+            self.phases[phase] = (time.monotonic() - self.requested) * 1000
+
+    def on_status(self, data):
+        self.mark_phase("first_status")
+        if data.get("state") == "playing" and "playing" not in self.phases:
+            self.mark_phase("playing")
+            self.record_launch("playing")
+        self.set_state(status_text(data))
+
+    def record_launch(self, outcome):
+        # Once per session: when the game first reports playing, or when it
+        # ends without ever getting there
+        if self.launch_saved or not self.data_dir:
+            return
+        self.launch_saved = True
+        instance_path = self.instance["path"]
+        try:
+            settings = game_settings.read(game_settings.settings_path(os.path.dirname(instance_path)))
+            entry = launch_history.new_entry(self.phases, launch_history.binary_id(instance_path), settings, outcome)
+            entry["session"] = self.session_name
+            alert = launch_history.check_regression(launch_history.load(self.data_dir), entry)
+            launch_history.append(self.data_dir, entry)
+        except (OSError, ValueError) as e:
+            print(f"Error saving launch history: {e}")
+            return
+        self.launch_recorded.emit(self, entry, alert)
+
+    def set_state(self, text):
+        self.state_text = text
+        self.status_changed.emit(self, text)
+
+    def close_status_channel(self):
+        if self.status_channel:
+            self.status_channel.close()
+            self.status_channel.deleteLater()
+            self.status_channel = None
+
+    def close_log(self):
+        if self.log:
+            self.log.close()
+            self.log = None
+
+    def save_metrics(self):
+        if self.sampler is None or not len(self.sampler.ring):
+            return
+        info = {"instance": self.instance.get("id"), "name": self.name, "path": self.instance["path"],
+                "pid": self.sampler.pid, "state": self.state_text}
+        try:
+            self.metrics_paths = metrics.export(self.sampler.ring, metrics.metrics_dir(self.data_dir),
+                                                self.session_name, info)
+        except OSError as e:
+            print(f"Error saving metrics: {e}")
+
+    def on_started(self):
+        if metrics.supported():
+            self.sampler = metrics.ProcessSampler(self.process.processId())
+        self.mark_phase("process_start")
+        tracing.instant("game started", instance=self.name, pid=self.process.processId())
+        self.set_state("Running")
+        self.started.emit(self)
+
+    def on_finished(self, exit_code, exit_status):
+        self.read_stdout()
+        self.read_stderr()
+        self.close_status_channel()
+        self.close_log()
+        if exit_status == QProcess.ExitStatus.CrashExit:
+            text = "Crashed"
+        elif exit_code == 0:
+            text = "Finished"
+        else:
+            text = f"Finished (Exit Code: {exit_code})"
+        self.state_text = text
+        try:
+            self.save_metrics()
+            self.record_launch(text)
+        finally:
+            # Whatever went wrong above, the session has to end
+            self.finished.emit(self, text)
+
+    def on_error(self, error):
+        if error != QProcess.ProcessError.FailedToStart:
+            self.set_state(f"Process Error: {error}")
+            return
+        # finished is never emitted for a process that didn't start
+        self.close_status_channel()
+        self.close_log()
+        self.state_text = "Error: Binary not found or failed to start"
+        try:
+            self.record_launch(self.state_text)
+        finally:
+            self.finished.emit(self, self.state_text)
+
+    def read_stdout(self):
+        self.handle_output("stdout", self.process.readAllStandardOutput().data())
+
+    def read_stderr(self):
+        self.handle_output("stderr", self.process.readAllStandardError().data())
+
+    def handle_output(self, channel, data):
+        if not data:
+            return
+        self.mark_phase("first_output")
+        if self.log:
+            self.log.write(data)
+        self.output.emit(self, channel, data)
+
+
+class Supervisor(QObject):
+    # Runs any number of game sessions side by side, at most max_concurrent
+    # at once; further launches wait in a FIFO queue.
+    session_started = Signal(object)
+    session_status = Signal(object, str)
+    session_output = Signal(object, str, bytes)
+    session_finished = Signal(object, str)
+    session_queued = Signal(object)
+    session_metrics = Signal(object, object) # (session, latest sample)
+    launch_recorded = Signal(object, object, object) # (session, history entry, regression alert or None)
+
+    def __init__(self, max_concurrent=DEFAULT_MAX_CONCURRENT, parent=None):
+        super().__init__(parent)
+        self.max_concurrent = max(1, max_concurrent)
+        self.sessions = {}
+        self.queue = deque()
+
+        # One timer samples every running game's processes
+        self.metrics_timer = QTimer(self)
+        self.metrics_timer.setInterval(metrics.SAMPLE_INTERVAL)
+        self.metrics_timer.timeout.connect(self.sample_metrics)
+
+    def running_count(self):
+        return len(self.sessions)
+
+    def get(self, key):
+        session = self.sessions.get(key)
+        if session is None:
+            session = next((queued for queued in self.queue if queued.key == key), None)
+        return session
+
+    def is_active(self, key):
+        return self.get(key) is not None
+
+    def launch(self, key, instance):
+        # Returns the session, or None if this instance is already running or
+        # queued
+        if self.is_active(key):
+            return None
+
+        session = GameSession(key, instance, self)
+        session.started.connect(self.session_started)
+        session.status_changed.connect(self.session_status)
+        session.output.connect(self.session_output)
+        session.finished.connect(self.on_session_finished)
+        session.launch_recorded.connect(self.launch_recorded)
+
+        self.queue.append(session)
+        self.session_queued.emit(session)
+        self.start_next()
+        return session
+
+    def launch_many(self, items):
+        return [self.launch(key, instance) for key, instance in items]
+
+    def set_max_concurrent(self, count):
+        self.max_concurrent = max(1, count)
+        self.start_next()
+
+    def start_next(self):
+        while self.queue and len(self.sessions) < self.max_concurrent:
+            session = self.queue.popleft()
+            self.sessions[session.key] = session
+            session.start()
+        if self.sessions and not self.metrics_timer.isActive() and metrics.supported():
+            self.metrics_timer.start()
+
+    def kill(self, key):
+        session = self.get(key)
+        if session is None:
+            return False
+        if session.key in self.sessions:
+            session.kill()
+        else:
+            self.queue.remove(session)
+            session.state_text = "Cancelled"
+            self.session_finished.emit(session, session.state_text)
+            session.deleteLater()
+        return True
+
+    def kill_all(self):
+        for session in list(self.queue):
+            self.kill(session.key)
+        for session in list(self.sessions.values()):
+            session.kill()
+
+    def sample_metrics(self):
+        sampled = [session for session in self.sessions.values() if session.sampler is not None]
+        if not self.sessions:
+            self.metrics_timer.stop()
+        for session, sample in zip(sampled, metrics.sample_all([session.sampler for session in sampled])):
+            if sample is not None:
+                self.session_metrics.emit(session, sample)
+
+    def on_session_finished(self, session, text):
+        self.sessions.pop(session.key, None)
+        self.session_finished.emit(session, text)
+        session.deleteLater()
+        self.start_next()
@@ -0,0 +1,84 @@
+import threading
+
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, Signal
+
+import tracing
+
+MAX_WORKERS = 4
+
+_pool = None
+_active = set()
+_active_lock = threading.Lock()
+
+
+class TaskSignals(QObject):
+    finished = Signal(object)
+    error = Signal(str)
+    progress = Signal(object, object)  # (done, total), ints can exceed 32 bits
+
+
+class Task(QRunnable):
+    # Runs fn(task, *args, **kwargs) on the shared pool. fn may call
+    # task.report_progress() and should poll task.cancel_event (or pass it on
+    # to the download engine). Nothing is emitted once a task is cancelled, so
+    # stale results never reach the UI.
+    def __init__(self, fn, *args, **kwargs):
+        super().__init__()
+        self.setAutoDelete(False)
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.signals = TaskSignals()
+        self.cancel_event = threading.Event()
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    def is_cancelled(self):
+        return self.cancel_event.is_set()
+
+    def emit(self, signal, *args):
+        if self.is_cancelled():
+            return
+        try:
+            signal.emit(*args)
+        except RuntimeError:
+            pass # Signals object already destroyed, the app is shutting down
+
+    def report_progress(self, done, total):
+        self.emit(self.signals.progress, done, total)
+
+    def run(self):
+        try:
+            with tracing.span(self.fn.__name__, "task"):
+                result = self.fn(self, *self.args, **self.kwargs)
+            self.emit(self.signals.finished, result)
+        except Exception as e:
+            self.emit(self.signals.error, str(e))
+        finally:
+            with _active_lock:
+                _active.discard(self)
+
+
+def pool():
+    global _pool
+    if _pool is None:
+        _pool = QThreadPool()
+        _pool.setMaxThreadCount(MAX_WORKERS)
+    return _pool
+
+
+def run_task(fn, *args, on_finished=None, on_error=None, on_progress=None, **kwargs):
+    task = Task(fn, *args, **kwargs)
+    if on_finished:
+        task.signals.finished.connect(on_finished)
+    if on_error:
+        task.signals.error.connect(on_error)
+    if on_progress:
+        task.signals.progress.connect(on_progress)
+
+    # Keep a reference until the task completes so its signals stay alive
+    with _active_lock:
+        _active.add(task)
+    pool().start(task)
+    return task
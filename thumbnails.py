@@ -0,0 +1,109 @@
+import os
+import hashlib
+import threading
+
+from PySide6.QtCore import Qt
+from PySide6.QtGui import QImageReader
+
+import paths
+
+THUMBNAIL_SIZES = (64, 128)
+MAX_CACHE_BYTES = 32 * 1024 * 1024 # Least recently used thumbnails go first past this
+
+_lock = threading.Lock()
+
+
+def thumbnail_dir():
+    return paths.cache_dir("thumbnails")
+
+
+def thumbnail_name(source, st, size):
+    # <source>-<version>-<size>.png, so stale versions of a source are easy to find
+    source_key = hashlib.sha1(os.path.abspath(source).encode("utf-8")).hexdigest()[:16]
+    version = hashlib.sha1(f"{st.st_mtime_ns}:{st.st_size}".encode("utf-8")).hexdigest()[:8]
+    return f"{source_key}-{version}-{size}.png"
+
+
+def decode(path, size):
+    # Decodes an image to fit size x size, straight at the target size when
+    # the format allows it
+    reader = QImageReader(path)
+    reader.setAutoTransform(True)
+    original = reader.size()
+    if original.isValid() and (original.width() > size or original.height() > size):
+        reader.setScaledSize(original.scaled(size, size, Qt.AspectRatioMode.KeepAspectRatio))
+    image = reader.read()
+    if image.isNull():
+        return None
+    if image.width() > size or image.height() > size:
+        image = image.scaled(size, size, Qt.AspectRatioMode.KeepAspectRatio,
+                             Qt.TransformationMode.SmoothTransformation)
+    return image
+
+
+def load(source, size):
+    # Returns a QImage of at most size x size for source, from the thumbnail
+    # cache when it is current, or None if the source can't be read. Safe to
+    # call off the GUI thread.
+    try:
+        st = os.stat(source)
+    except OSError:
+        return None
+
+    directory = thumbnail_dir()
+    name = thumbnail_name(source, st, size)
+    path = os.path.join(directory, name)
+    if os.path.exists(path):
+        image = QImageReader(path).read()
+        if not image.isNull():
+            try:
+                os.utime(path) # mtime doubles as the last use for eviction
+            except OSError:
+                pass
+            return image
+
+    image = decode(source, size)
+    if image is None:
+        return None
+    store(image, directory, name)
+    return image
+
+
+def store(image, directory, name):
+    os.makedirs(directory, exist_ok=True)
+    tmp_path = os.path.join(directory, f"{name}.{threading.get_ident()}.tmp")
+    if not image.save(tmp_path, "PNG"):
+        return
+    path = os.path.join(directory, name)
+    with _lock:
+        os.replace(tmp_path, path)
+
+        # Older versions of the same source at this size are stale now
+        source_key, version, thumb_size = name[:-len(".png")].split("-")
+        entries = []
+        for entry in os.scandir(directory):
+            if not entry.name.endswith(".png"):
+                continue
+            parts = entry.name[:-len(".png")].split("-")
+            if parts[0] == source_key and parts[2] == thumb_size and parts[1] != version:
+                remove(entry.path)
+                continue
+            if entry.path == path:
+                continue # Never evict what was just made
+            st = entry.stat()
+            entries.append((st.st_mtime, st.st_size, entry.path))
+
+        total = sum(size for mtime, size, old_path in entries)
+        entries.sort()
+        for mtime, size, old_path in entries:
+            if total <= MAX_CACHE_BYTES:
+                break
+            remove(old_path)
+            total -= size
+
+
+def remove(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
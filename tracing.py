@@ -0,0 +1,183 @@
+import os
+import sys
+import json
+import time
+import atexit
+import threading
+
+# Span tracing of the launcher's hot paths, written as Chrome trace events
+# (open the file in chrome://tracing or ui.perfetto.dev). Off by default:
+# span() then hands back a shared no-op object, so instrumented code pays a
+# global lookup and a call. Turned on with --trace[=PATH] or
+# SKAKAVI_TRACE=1|PATH, and --profile[=PATH] / SKAKAVI_PROFILE runs the
+# event loop (or a CLI command) under cProfile.
+
+TRACE_ARG = "--trace"
+PROFILE_ARG = "--profile"
+TRACE_ENV = "SKAKAVI_TRACE"
+PROFILE_ENV = "SKAKAVI_PROFILE"
+PROFILE_TOP = 30 # Functions printed by cumulative time after profiling
+
+START = time.perf_counter()
+
+enabled = False
+trace_path = None
+profile_path = None
+
+_events = []
+_named_threads = set()
+_pid = os.getpid()
+
+
+class NullSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def set(self, **args):
+        pass
+
+
+NULL_SPAN = NullSpan()
+
+
+class Span:
+    # One complete ("X") event, recorded when the block exits. Arguments can
+    # be added while it runs with set(), e.g. the status of a response.
+    __slots__ = ("name", "category", "args", "start")
+
+    def __init__(self, name, category, args):
+        self.name = name
+        self.category = category
+        self.args = args
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.args["error"] = exc_type.__name__
+        record(self.name, self.category, self.start, time.perf_counter(), self.args)
+        return False
+
+    def set(self, **args):
+        self.args.update(args)
+
+
+def thread_id():
+    # Names each thread once, the first time it records anything
+    thread = threading.current_thread()
+    tid = thread.ident
+    if tid not in _named_threads:
+        _named_threads.add(tid)
+        _events.append({"ph": "M", "name": "thread_name", "pid": _pid, "tid": tid, "args": {"name": thread.name}})
+    return tid
+
+
+def record(name, category, start, end, args=None):
+    # list.append is atomic, so worker threads record without a lock
+    event = {"ph": "X", "name": name, "cat": category, "pid": _pid, "tid": thread_id(),
+             "ts": (start - START) * 1e6, "dur": (end - start) * 1e6}
+    if args:
+        event["args"] = args
+    _events.append(event)
+
+
+def span(name, category="launcher", **args):
+    if not enabled:
+        return NULL_SPAN
+    return Span(name, category, args)
+
+
+def instant(name, category="launcher", **args):
+    if not enabled:
+        return
+    event = {"ph": "i", "s": "t", "name": name, "cat": category, "pid": _pid, "tid": thread_id(),
+             "ts": (time.perf_counter() - START) * 1e6}
+    if args:
+        event["args"] = args
+    _events.append(event)
+
+
+def default_path(prefix, extension):
+    return os.path.abspath(f"{prefix}-{time.strftime('%Y%m%d-%H%M%S')}-{_pid}.{extension}")
+
+
+def start(path=None):
+    # Starts recording, the trace is written when the process exits
+    global enabled, trace_path
+    if not enabled:
+        atexit.register(save)
+    trace_path = path or default_path("trace", "json")
+    enabled = True
+
+
+def save(path=None):
+    path = path or trace_path
+    if not path:
+        return None
+    data = {
+        "traceEvents": list(_events),
+        "displayTimeUnit": "ms",
+        "otherData": {"argv": sys.argv, "pid": _pid},
+    }
+    try:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, "w") as f:
+            json.dump(data, f)
+    except OSError as e:
+        print(f"Error writing trace: {e}", file=sys.stderr)
+        return None
+    print(f"Trace written to {path} ({len(data['traceEvents'])} events)", file=sys.stderr)
+    return path
+
+
+def option_value(argv, flag, env):
+    # "" for a bare flag (or SKAKAVI_...=1), the path if one was given, None
+    # when off
+    value = os.environ.get(env)
+    if value is not None:
+        value = "" if value.lower() in ("", "1", "true", "yes", "on") else value
+    for arg in argv:
+        if arg == flag:
+            value = ""
+        elif arg.startswith(flag + "="):
+            value = arg[len(flag) + 1:]
+    return value
+
+
+def enable_profile(path=None):
+    global profile_path
+    profile_path = path or default_path("profile", "prof")
+
+
+def configure(argv=None):
+    # Reads the flags and environment, for main.py (the CLI parses its own
+    # flags and passes an empty argv)
+    argv = sys.argv[1:] if argv is None else argv
+    trace = option_value(argv, TRACE_ARG, TRACE_ENV)
+    if trace is not None:
+        start(trace or None)
+    profile = option_value(argv, PROFILE_ARG, PROFILE_ENV)
+    if profile is not None:
+        enable_profile(profile or None)
+
+
+def profiled(fn, *args, **kwargs):
+    # Calls fn under cProfile when profiling is on. The stats are saved for
+    # pstats / snakeviz and the top functions printed. Only the calling
+    # thread is profiled, the spans cover the workers.
+    if not profile_path:
+        return fn(*args, **kwargs)
+    import cProfile
+    import pstats
+    profiler = cProfile.Profile()
+    try:
+        return profiler.runcall(fn, *args, **kwargs)
+    finally:
+        profiler.dump_stats(profile_path)
+        pstats.Stats(profiler, stream=sys.stderr).sort_stats("cumulative").print_stats(PROFILE_TOP)
+        print(f"Profile written to {profile_path}", file=sys.stderr)